@@ -1,12 +1,24 @@
 # app.py
 from __future__ import annotations
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory
+from contextlib import contextmanager
+import atexit
+import json
+import math
+import os
+import threading
+import time
 import uuid
-from typing import Dict, Any, Optional, Tuple
-import requests
+from typing import Dict, Any, Iterator, Optional, Tuple
 
-from rl import QLearningAgent, check_winner_abs, is_full_abs, abs_to_state
+from rl import QLearningAgent, ConvergenceCriteria, LEARNING_MODES, check_winner_abs, is_full_abs, abs_to_state
 from minimax import minimax_best_move
+from players import BOT_KINDS, ENGINE_KINDS, choose_move, remote_move_board
+from ngame import get_geometry
+from mcts import Q_POLICIES, MCTSSearcher
+from tournament import run_tournament
+from replay_buffer import ReplayBuffer
+from eventlog import EventLog
 from flask_cors import CORS
 
 
@@ -15,10 +27,71 @@ CORS(app)
 
 
 
-agent = QLearningAgent(qtable_path="qtable.pkl")
+# QTABLE_PATH : fichier de la Q-table ; QTABLE_STORAGE = float32 | float16 | int8 : sauvegarde compacte (qcompact.py)
+agent = QLearningAgent(
+    qtable_path=os.environ.get("QTABLE_PATH", "qtable.pkl"),
+    storage=os.environ.get("QTABLE_STORAGE", "pickle"),
+    sync_url=os.environ.get("QSYNC_URL", ""),
+)
 
 GAMES: Dict[str, Dict[str, Any]] = {}
 
+# journal des parties humaines (EVENT_LOG_DIR="" pour désactiver) ; rejouable via offline_train.py
+_event_log_dir = os.environ.get("EVENT_LOG_DIR", "logs")
+EVENT_LOG: Optional[EventLog] = EventLog(_event_log_dir) if _event_log_dir else None
+
+# capture du trafic (CAPTURE_DIR vide = désactivé) ; rejouable via traffic_replay.py
+_capture_dir = os.environ.get("CAPTURE_DIR", "")
+CAPTURE_LOG: Optional[EventLog] = EventLog(_capture_dir, prefix="capture") if _capture_dir else None
+CAPTURED_PATHS = ("/api/new", "/api/move", "/api/train", "/api/arena")
+
+# snapshots Q-table utilisables en tournoi via HTTP ("rl:<nom>" = fichier de ce dossier)
+SNAPSHOT_DIR = os.environ.get("QTABLE_SNAPSHOT_DIR", "snapshots")
+
+# RL_ONLINE_UPDATES=0 : le bot RL joue sans apprendre (apprentissage hors ligne uniquement)
+ONLINE_UPDATES = os.environ.get("RL_ONLINE_UPDATES", "1") != "0"
+
+# budget de réflexion par coup des bots à recherche (alphabeta, mcts), en ms
+BOT_THINK_MS = float(os.environ.get("BOT_THINK_MS", "200"))
+# MCTS : budget en playouts (0 = budget en temps), process en parallèle, politique Q-table
+MCTS_PLAYOUTS = int(os.environ.get("MCTS_PLAYOUTS", "0"))
+MCTS_WORKERS = int(os.environ.get("MCTS_WORKERS", "1"))
+MCTS_Q_POLICY = os.environ.get("MCTS_Q_POLICY", "")
+
+# arenas en streaming en cours : run_id -> drapeau d'annulation
+ARENA_RUNS: Dict[str, threading.Event] = {}
+
+# sauvegardes de la Q-table différées pendant un lot (voir _batched_save)
+_SAVE_STATE: Dict[str, Any] = {"defer": 0, "dirty": False}
+_SAVE_LOCK = threading.Lock()
+
+# stockage compact : compacter coûte ~10× un pickle brut, les sauvegardes par coup sont
+# regroupées toutes les QTABLE_SAVE_INTERVAL secondes (et à l'arrêt)
+QTABLE_SAVE_INTERVAL = float(os.environ.get("QTABLE_SAVE_INTERVAL", "10"))
+
+# synchro périodique avec l'agrégateur (qsync_server.py) si QSYNC_URL est défini
+QSYNC_INTERVAL = float(os.environ.get("QSYNC_INTERVAL", "30"))
+QSYNC_STATUS: Dict[str, Any] = {"last": None, "error": "", "at": 0.0}
+
+
+def _qsync_loop() -> None:
+    while True:
+        time.sleep(QSYNC_INTERVAL)
+        try:
+            QSYNC_STATUS["last"] = agent.sync()
+            QSYNC_STATUS["error"] = ""
+            _save_agent()
+        except Exception as e:
+            QSYNC_STATUS["error"] = str(e)
+        QSYNC_STATUS["at"] = time.time()
+
+
+if agent.sync_url:
+    threading.Thread(target=_qsync_loop, name="qsync", daemon=True).start()
+
+# buffer d'experience replay partagé entre les appels /api/train (créé à la demande)
+REPLAY: Optional[ReplayBuffer] = None
+
 STATS: Dict[str, Any] = {
     "games_total": 0,
     "bot_wins": 0,
@@ -37,6 +110,46 @@ STATS: Dict[str, Any] = {
 }
 
 
+@app.before_request
+def _capture_start():
+    if request.path in CAPTURED_PATHS:
+        g.capture_t0 = time.perf_counter()
+        g.capture_ts = time.time()
+
+
+@app.after_request
+def _capture_end(response: Response) -> Response:
+    t0 = g.get("capture_t0")
+    if t0 is None:
+        return response
+
+    # durée côté serveur jusqu'à la réponse complète (en stream : jusqu'aux en-têtes)
+    ms = round((time.perf_counter() - t0) * 1000.0, 3)
+    response.headers["Server-Timing"] = f"app;dur={ms}"
+    if CAPTURE_LOG is None:
+        return response
+
+    rec: Dict[str, Any] = {
+        "ts": round(g.capture_ts, 4),
+        "ms": ms,
+        "m": request.method,
+        "p": request.path,
+        "st": response.status_code,
+    }
+    if request.query_string:
+        rec["q"] = request.query_string.decode("utf-8", "replace")
+    body = request.get_json(silent=True) if request.data else None
+    if body is not None:
+        rec["b"] = body
+    if not response.is_streamed:
+        out = response.get_json(silent=True)
+        if isinstance(out, dict):
+            out.pop("global_stats", None)
+            rec["r"] = out
+    CAPTURE_LOG.append(rec)
+    return response
+
+
 @app.get("/")
 def index():
     return send_from_directory("static", "index.html")
@@ -65,44 +178,13 @@ def set_epsilon():
 # ------------------ GAME API (humain vs bot) ------------------
 @app.get("/api/new")
 def new_game():
-    bot = (request.args.get("bot", "rl") or "rl").lower()
-    if bot not in ("rl", "minimax", "remote"):
-        bot = "rl"
-
-    human_as = (request.args.get("human_as") or "X").upper()
-    human_mark = 1 if human_as == "X" else -1
-    bot_mark = -human_mark
-
-    remote_url = (request.args.get("remote_url") or "").strip().rstrip("/")
-
-    # strict remote
-    if bot == "remote" and not remote_url:
-        return jsonify({"error": "Remote API sélectionnée mais l'URL est vide."}), 400
-
-    gid = str(uuid.uuid4())
-    game = {
-        "id": gid,
-        "board": [0] * 9,
-        "turn": 1,
-        "bot_kind": bot,
-        "bot_mark": bot_mark,
-        "human_mark": human_mark,
-        "remote_url": remote_url,
-
-        "done": False,
-        "winner": 0,
-        "counted": False,
-
-        "last_bot_s": None,
-        "last_bot_a": None,
-
-        "error": "",
-    }
-    GAMES[gid] = game
-
-    if game["turn"] == game["bot_mark"] and not game["done"]:
-        _bot_move(game)
-
+    game, err = _create_game(
+        request.args.get("bot", "rl"),
+        request.args.get("human_as"),
+        request.args.get("remote_url"),
+    )
+    if game is None:
+        return jsonify({"error": err}), 400
     return jsonify(_public_game(game))
 
 
@@ -110,40 +192,81 @@ def new_game():
 def human_move():
     data = request.get_json(force=True)
     gid = data.get("game_id")
-    pos = int(data.get("pos"))
 
-    if gid not in GAMES:
-        return jsonify({"error": "Partie introuvable"}), 404
+    payload, status = _apply_human_move(GAMES.get(gid), data.get("pos"))
+    return jsonify(payload), status
 
-    game = GAMES[gid]
-    if game["done"]:
-        return jsonify(_public_game(game))
 
-    if game.get("error"):
-        game["done"] = True
-        game["winner"] = 0
-        _maybe_count_game_end(game)
-        return jsonify(_public_game(game))
+# ------------------ BATCH API (clients à fort volume) ------------------
+BATCH_MAX_GAMES = 1000
+BATCH_MAX_MOVES = 5000
 
-    human_mark = game["human_mark"]
 
-    if game["turn"] != human_mark:
-        return jsonify({"error": "Ce n'est pas à toi de jouer"}), 400
+@app.post("/api/batch/new")
+def batch_new():
+    """
+    Body JSON:
+      - games: [{"bot", "human_as", "remote_url"}, ...]
+      - ou count: int + bot / human_as / remote_url communs
+    Réponse : une entrée par partie, {"ok": true, "game": ..} ou {"ok": false, "error": .., "status": ..}
+    """
+    data = request.get_json(force=True) if request.data else {}
 
-    if pos < 0 or pos > 8 or game["board"][pos] != 0:
-        return jsonify({"error": "Coup invalide"}), 400
+    specs = data.get("games")
+    if specs is None:
+        try:
+            count = int(data.get("count", 1))
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "count doit être un entier"}), 400
+        specs = [data] * max(0, min(count, BATCH_MAX_GAMES + 1))
+    if not isinstance(specs, list) or not specs or len(specs) > BATCH_MAX_GAMES:
+        return jsonify({"ok": False, "error": f"games: 1..{BATCH_MAX_GAMES} parties"}), 400
+
+    out = []
+    with _batched_save():
+        for spec in specs:
+            spec = spec if isinstance(spec, dict) else {}
+            game, err = _create_game(spec.get("bot", "rl"), spec.get("human_as"), spec.get("remote_url"))
+            if game is None:
+                out.append({"ok": False, "error": err, "status": 400})
+            else:
+                out.append({"ok": True, "game": _public_game(game, with_stats=False)})
+
+    return jsonify({"ok": True, "games": out, "global_stats": STATS, "epsilon": float(agent.epsilon)})
+
+
+@app.post("/api/batch/move")
+def batch_move():
+    """
+    Body JSON:
+      - moves: [{"game_id", "pos"}, ...] (plusieurs coups d'une même partie : appliqués dans l'ordre)
+    Réponse : une entrée par coup, dans le même ordre.
+    """
+    data = request.get_json(force=True) if request.data else {}
 
-    game["board"][pos] = human_mark
-    _update_terminal(game)
+    moves = data.get("moves")
+    if not isinstance(moves, list) or not moves or len(moves) > BATCH_MAX_MOVES:
+        return jsonify({"ok": False, "error": f"moves: 1..{BATCH_MAX_MOVES} coups"}), 400
 
-    if game["done"]:
-        _credit_last_rl_if_needed(game)
-        return jsonify(_public_game(game))
+    # une seule passe sur GAMES pour toutes les parties du lot
+    wanted = {m.get("game_id") for m in moves if isinstance(m, dict) and isinstance(m.get("game_id"), str)}
+    games = {gid: GAMES.get(gid) for gid in wanted}
 
-    game["turn"] *= -1
-    _bot_move(game)
+    out = []
+    with _batched_save():
+        for m in moves:
+            m = m if isinstance(m, dict) else {}
+            gid = m.get("game_id")
+            if not isinstance(gid, str):
+                out.append({"ok": False, "error": "game_id: chaîne attendue", "status": 400})
+                continue
+            payload, status = _apply_human_move(games.get(gid), m.get("pos"), with_stats=False)
+            if status == 200:
+                out.append({"ok": True, "game": payload})
+            else:
+                out.append({"ok": False, "error": payload.get("error", ""), "status": status})
 
-    return jsonify(_public_game(game))
+    return jsonify({"ok": True, "results": out, "global_stats": STATS, "epsilon": float(agent.epsilon)})
 
 
 @app.post("/api/train")
@@ -159,14 +282,48 @@ def train():
         except Exception:
             pass
 
+    if "learning_mode" in data:
+        lm = (data.get("learning_mode") or "td0").lower()
+        if lm not in LEARNING_MODES:
+            return jsonify({"ok": False, "error": "learning_mode invalide"}), 400
+        agent.learning_mode = lm
+
+    if "lambda" in data:
+        try:
+            agent.lam = max(0.0, min(1.0, float(data["lambda"])))
+        except Exception:
+            pass
+
+    if "adaptive_alpha" in data:
+        agent.adaptive_alpha = bool(data["adaptive_alpha"])
+
     mode = (data.get("mode") or "selfplay").lower()
     if mode not in ("selfplay", "minimax"):
         mode = "selfplay"
 
+    # arrêt anticipé : {"window": 200, "max_q_delta": .., "max_policy_change": .., "min_draw_rate": ..}
+    convergence = None
+    if isinstance(data.get("convergence"), dict):
+        try:
+            convergence = ConvergenceCriteria.from_dict(data["convergence"])
+        except Exception:
+            return jsonify({"ok": False, "error": "convergence invalide"}), 400
+
+    # experience replay : {"size": 10000, "ratio": 1.0, "batch_size": 32, "prioritized": false}
+    replay = None
+    if isinstance(data.get("replay"), dict):
+        try:
+            replay = _get_replay_buffer(data["replay"])
+        except Exception:
+            return jsonify({"ok": False, "error": "replay invalide"}), 400
+
     if mode == "minimax":
-        stats = agent.train_vs_minimax(episodes=episodes)
+        stats = agent.train_vs_minimax(episodes=episodes, convergence=convergence, replay=replay)
     else:
-        stats = agent.self_play(episodes=episodes)
+        stats = agent.self_play(episodes=episodes, convergence=convergence, replay=replay)
+
+    if replay is not None:
+        stats["replay_size"] = float(len(replay))
 
     agent.save()
 
@@ -184,7 +341,19 @@ def train():
         STATS["minimax_losses"] += int(round(stats.get("agent_loss_rate", 0.0) * eps_count))
         STATS["minimax_draws"] += int(round(stats.get("draw_rate", 0.0) * eps_count))
 
-    return jsonify({"ok": True, "mode": mode, "stats": stats, "global_stats": STATS, "epsilon": float(agent.epsilon)})
+    return jsonify({
+        "ok": True,
+        "mode": mode,
+        "learning_mode": agent.learning_mode,
+        "stats": stats,
+        "global_stats": STATS,
+        "epsilon": float(agent.epsilon),
+    })
+
+
+@app.get("/api/qsync")
+def qsync_status():
+    return jsonify({"ok": True, "url": agent.sync_url, "version": agent.sync_version, **QSYNC_STATUS})
 
 
 @app.get("/api/state")
@@ -200,20 +369,37 @@ def state():
 def arena():
     """
     Body JSON:
-      - x: "rl" | "minimax" | "remote"
-      - o: "rl" | "minimax" | "remote"
+      - x: "rl" | "minimax" | "remote" | "alphabeta" | "mcts"
+      - o: "rl" | "minimax" | "remote" | "alphabeta" | "mcts"
       - remote_url: obligatoire si x ou o == "remote"
       - games: int (1..5000)
+      - size, k: board size×size, k alignés pour gagner (défaut 3, 3) ; hors 3×3,
+                 seuls les bots "alphabeta" / "mcts" sont acceptés
+      - think_ms: budget par coup des bots à recherche (défaut BOT_THINK_MS)
+      - mcts: {"playouts": 0, "workers": 1, "q_policy": "" | "rollout" | "prior"}
+      - stream: bool -> réponse NDJSON (une ligne "start", des lignes "progress", une ligne "done")
+      - batch: parties entre deux lignes "progress" (mode stream, défaut 10)
+      - run_id: identifiant pour /api/arena/cancel (mode stream, généré si absent)
+      - sequential: {"z": 2.576, "min_games": 30, "margin": 0.05} (mode stream)
+          arrêt dès que l'écart X-O est tranché : IC hors de 0 (différence) ou dans ±margin (équivalence)
     """
     data = request.get_json(force=True) if request.data else {}
 
     x_kind = (data.get("x") or "remote").lower()
     o_kind = (data.get("o") or "rl").lower()
-    if x_kind not in ("rl", "minimax", "remote"):
+    if x_kind not in BOT_KINDS:
         x_kind = "rl"
-    if o_kind not in ("rl", "minimax", "remote"):
+    if o_kind not in BOT_KINDS:
         o_kind = "rl"
 
+    size = int(data.get("size", 3))
+    k = int(data.get("k", size))
+    if not (3 <= size <= 9) or not (3 <= k <= size):
+        return jsonify({"ok": False, "error": "il faut 3 <= k <= size <= 9"}), 400
+    if (size, k) != (3, 3) and not (x_kind in ENGINE_KINDS and o_kind in ENGINE_KINDS):
+        return jsonify({"ok": False, "error": f"hors 3×3, bots acceptés : {', '.join(ENGINE_KINDS)}"}), 400
+    engine = _engine_opts(data)
+
     remote_url = (data.get("remote_url") or "").strip().rstrip("/")
     if ("remote" in (x_kind, o_kind)) and not remote_url:
         return jsonify({"ok": False, "error": "remote_url requis (Remote API sélectionnée)."}), 400
@@ -221,10 +407,47 @@ def arena():
     games = int(data.get("games", 50))
     games = max(1, min(games, 5000))
 
-    results = {
+    results = _new_arena_results(games, x_kind, o_kind, size, k)
+
+    if data.get("stream"):
+        batch = max(1, min(int(data.get("batch", 10)), games))
+        run_id = str(data.get("run_id") or uuid.uuid4())
+        seq = None
+        if isinstance(data.get("sequential"), dict):
+            # validé ici : une erreur dans le générateur arriverait après l'en-tête 200
+            try:
+                seq = _sequential_opts(data["sequential"], games)
+            except (TypeError, ValueError) as e:
+                return jsonify({"ok": False, "error": f"sequential invalide: {e}"}), 400
+        gen = _arena_stream(results, remote_url, batch, run_id, seq, engine)
+        return Response(gen, mimetype="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+    total_moves = 0
+    for winner, moves, error_msg in _arena_games(x_kind, o_kind, remote_url, games, size, k, engine):
+        total_moves += moves
+        _add_arena_game(results, winner, error_msg)
+
+    results["avg_moves"] = (total_moves / games) if games else 0.0
+    return jsonify({"ok": True, "result": results})
+
+
+@app.post("/api/arena/cancel")
+def arena_cancel():
+    data = request.get_json(force=True) if request.data else {}
+    run_id = str(data.get("run_id") or "")
+    if run_id not in ARENA_RUNS:
+        return jsonify({"ok": False, "error": "run_id inconnu"}), 404
+    ARENA_RUNS[run_id].set()
+    return jsonify({"ok": True, "run_id": run_id})
+
+
+def _new_arena_results(games: int, x_kind: str, o_kind: str, size: int = 3, k: int = 3) -> Dict[str, Any]:
+    return {
         "games": games,
         "x": x_kind,
         "o": o_kind,
+        "size": size,
+        "k": k,
         "x_wins": 0,
         "o_wins": 0,
         "draws": 0,
@@ -233,32 +456,50 @@ def arena():
         "last_error": "",
     }
 
-    total_moves = 0
 
+def _add_arena_game(results: Dict[str, Any], winner: int, error_msg: str) -> None:
+    if error_msg:
+        results["errors"] += 1
+        results["last_error"] = error_msg
+        results["draws"] += 1
+    elif winner == 1:
+        results["x_wins"] += 1
+    elif winner == -1:
+        results["o_wins"] += 1
+    else:
+        results["draws"] += 1
+
+
+def _arena_games(
+    x_kind: str,
+    o_kind: str,
+    remote_url: str,
+    games: int,
+    size: int = 3,
+    k: int = 3,
+    engine: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    Joue les parties une à une ; renvoie (winner, coups, erreur) par partie.
+    """
+    geom = get_geometry(size, k)
     for _ in range(games):
-        board_abs = [0] * 9
+        board_abs = [0] * geom.cells
         turn = 1  # X
         moves = 0
+        winner = 0
         error_msg = ""
 
         while True:
-            winner = check_winner_abs(board_abs)
-            if winner != 0:
-                if winner == 1:
-                    results["x_wins"] += 1
-                else:
-                    results["o_wins"] += 1
-                break
-            if is_full_abs(board_abs):
-                results["draws"] += 1
-                break
-
             player_kind = x_kind if turn == 1 else o_kind
             idx, err = _choose_bot_move_arena(
                 board_abs=board_abs,
                 player_abs=turn,
                 kind=player_kind,
                 remote_url=remote_url,
+                n=size,
+                k=k,
+                engine=engine,
             )
 
             if err:
@@ -267,17 +508,143 @@ def arena():
 
             board_abs[idx] = turn
             moves += 1
+            winner = geom.winner_at(board_abs, idx)
+            if winner != 0 or moves == geom.cells:
+                break
             turn *= -1
 
-        total_moves += moves
+        yield winner, moves, error_msg
 
-        if error_msg:
-            results["errors"] += 1
-            results["last_error"] = error_msg
-            results["draws"] += 1
 
-    results["avg_moves"] = (total_moves / games) if games else 0.0
-    return jsonify({"ok": True, "result": results})
+def _sequential_opts(raw: Dict[str, Any], games: int) -> Dict[str, Any]:
+    z = float(raw.get("z", 2.576))
+    margin = float(raw.get("margin", 0.05))
+    if not (math.isfinite(z) and z > 0) or not (math.isfinite(margin) and margin >= 0):
+        raise ValueError("z > 0 et margin >= 0 attendus")
+    return {
+        "z": min(z, 10.0),
+        # au moins 2 parties pour une variance
+        "min_games": max(2, min(int(raw.get("min_games", 30)), games)),
+        "margin": min(margin, 2.0),
+    }
+
+
+def _arena_stream(
+    results: Dict[str, Any],
+    remote_url: str,
+    batch: int,
+    run_id: str,
+    seq: Optional[Dict[str, Any]],
+    engine: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Générateur NDJSON de /api/arena en mode stream. S'arrête sur annulation
+    (/api/arena/cancel ou déconnexion du client -> GeneratorExit) ou test séquentiel.
+    """
+    cancel = ARENA_RUNS[run_id] = threading.Event()
+
+    z = seq["z"] if seq else 0.0
+    min_games = seq["min_games"] if seq else 0
+    margin = seq["margin"] if seq else 0.0
+
+    t0 = time.perf_counter()
+    played = 0
+    total_moves = 0
+    # score par partie : +1 victoire X, -1 victoire O, 0 nul (Welford)
+    mean = 0.0
+    m2 = 0.0
+    stop_reason = "complete"
+
+    def line(kind: str) -> str:
+        elapsed = time.perf_counter() - t0
+        n = max(1, played)
+        results["avg_moves"] = total_moves / n
+        payload = {
+            "type": kind,
+            "run_id": run_id,
+            "played": played,
+            "elapsed_s": elapsed,
+            "games_per_s": played / elapsed if elapsed > 0 else 0.0,
+            "x_win_rate": results["x_wins"] / n,
+            "o_win_rate": results["o_wins"] / n,
+            "draw_rate": results["draws"] / n,
+            "result": results,
+        }
+        if kind == "done":
+            payload["stop_reason"] = stop_reason
+        return json.dumps(payload) + "\n"
+
+    try:
+        yield json.dumps({"type": "start", "run_id": run_id, "games": results["games"],
+                          "x": results["x"], "o": results["o"], "size": results["size"], "k": results["k"]}) + "\n"
+
+        games = _arena_games(results["x"], results["o"], remote_url, results["games"],
+                             results["size"], results["k"], engine)
+        for winner, moves, error_msg in games:
+            played += 1
+            total_moves += moves
+            _add_arena_game(results, winner, error_msg)
+
+            score = 0 if error_msg else winner
+            d = score - mean
+            mean += d / played
+            m2 += d * (score - mean)
+
+            if cancel.is_set():
+                stop_reason = "cancelled"
+                break
+
+            if seq and played >= min_games:
+                half = z * math.sqrt(m2 / (played - 1) / played)
+                if abs(mean) > half:
+                    stop_reason = f"settled: x-o={mean:+.3f} ± {half:.3f}"
+                    break
+                if abs(mean) + half < margin:
+                    stop_reason = f"settled: |x-o| < {margin:g} ({mean:+.3f} ± {half:.3f})"
+                    break
+
+            if played % batch == 0 and played < results["games"]:
+                yield line("progress")
+
+        yield line("done")
+    finally:
+        ARENA_RUNS.pop(run_id, None)
+
+
+@app.post("/api/tournament")
+def tournament():
+    """
+    Body JSON:
+      - participants: liste de "rl" | "rl:<snapshot>" | "minimax" | "alphabeta" | "remote:<url>"
+                      (<snapshot> : nom d'un fichier de QTABLE_SNAPSHOT_DIR)
+                      ou {"name", "kind", "qtable", "url"} (au moins 2)
+      - games: parties par paire et par couleur (1..1000)
+      - workers: taille du pool (1..32)
+      - pool: "process" | "thread"
+    """
+    data = request.get_json(force=True) if request.data else {}
+
+    participants = data.get("participants") or []
+    if not isinstance(participants, list) or len(participants) < 2:
+        return jsonify({"ok": False, "error": "participants: au moins 2 requis"}), 400
+
+    games = max(1, min(int(data.get("games", 10)), 1000))
+    workers = max(1, min(int(data.get("workers", 4)), 32))
+    pool = "thread" if data.get("pool") == "thread" else "process"
+
+    try:
+        result = run_tournament(
+            participants,
+            games=games,
+            workers=workers,
+            pool=pool,
+            default_qtable=agent.qtable_path,
+            snapshot_dir=SNAPSHOT_DIR,
+        )
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    return jsonify({"ok": True, "result": result})
 
 
 def _choose_bot_move_arena(
@@ -285,29 +652,186 @@ def _choose_bot_move_arena(
     player_abs: int,
     kind: str,
     remote_url: str,
+    n: int = 3,
+    k: int = 3,
+    engine: Optional[Dict[str, Any]] = None,
 ) -> Tuple[int, str]:
-    if kind == "minimax":
-        return minimax_best_move(board_abs, player_abs), ""
-
-    if kind == "rl":
-        # évaluation : greedy, pas d'exploration
-        s = abs_to_state(board_abs, player_abs)
-        idx = agent.choose_action(s, epsilon_override=0.0)
-        if idx < 0 or idx > 8 or board_abs[idx] != 0:
-            return 0, "RL a produit un coup illégal (inattendu)."
-        return idx, ""
-
-    # remote
-    idx = _remote_move_board(board_abs, player_abs, remote_url)
-    if idx is None:
-        return 0, "Remote API injoignable (timeout/réponse invalide)."
-    if idx < 0 or idx > 8 or board_abs[idx] != 0:
-        return 0, "Remote API a renvoyé un coup illégal."
-    return idx, ""
+    return choose_move(board_abs, player_abs, kind, agent=agent, remote_url=remote_url,
+                       n=n, k=k, **(engine or _engine_opts({})))
+
+
+def _engine_opts(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Options des bots à recherche (think_ms + bloc "mcts"), bornées, défauts pris dans l'env."""
+    m = data.get("mcts") if isinstance(data.get("mcts"), dict) else {}
+    q_policy = str(m.get("q_policy", MCTS_Q_POLICY) or "")
+    return {
+        "think_ms": max(1.0, min(float(data.get("think_ms", BOT_THINK_MS)), 10000.0)),
+        "playouts": max(0, min(int(m.get("playouts", MCTS_PLAYOUTS)), 1_000_000)),
+        "workers": max(1, min(int(m.get("workers", MCTS_WORKERS)), os.cpu_count() or 1)),
+        "q_policy": q_policy if q_policy in Q_POLICIES else "",
+    }
 
 
 # ------------------ Helpers ------------------
-def _public_game(game: Dict[str, Any]) -> Dict[str, Any]:
+def _create_game(
+    bot: Optional[str],
+    human_as: Optional[str],
+    remote_url: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    bot = (bot or "rl").lower()
+    if bot not in BOT_KINDS:
+        bot = "rl"
+
+    human_as = (human_as or "X").upper()
+    human_mark = 1 if human_as == "X" else -1
+    bot_mark = -human_mark
+
+    remote_url = (remote_url or "").strip().rstrip("/")
+
+    # strict remote
+    if bot == "remote" and not remote_url:
+        return None, "Remote API sélectionnée mais l'URL est vide."
+
+    gid = str(uuid.uuid4())
+    game = {
+        "id": gid,
+        "board": [0] * 9,
+        "turn": 1,
+        "bot_kind": bot,
+        "bot_mark": bot_mark,
+        "human_mark": human_mark,
+        "remote_url": remote_url,
+
+        "done": False,
+        "winner": 0,
+        "counted": False,
+
+        "last_bot_s": None,
+        "last_bot_a": None,
+        "bot_moves": [],
+
+        "error": "",
+    }
+    GAMES[gid] = game
+    _log_event("new", game, bot_kind=bot, bot_mark=bot_mark, human_mark=human_mark)
+
+    if game["turn"] == game["bot_mark"] and not game["done"]:
+        _bot_move(game)
+
+    return game, ""
+
+
+def _apply_human_move(
+    game: Optional[Dict[str, Any]],
+    pos_raw: Any,
+    with_stats: bool = True,
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Joue le coup humain puis la réponse du bot. Renvoie (payload JSON, status HTTP).
+    """
+    if game is None:
+        return {"error": "Partie introuvable"}, 404
+
+    if game["done"]:
+        return _public_game(game, with_stats), 200
+
+    if game.get("error"):
+        game["done"] = True
+        game["winner"] = 0
+        _maybe_count_game_end(game)
+        return _public_game(game, with_stats), 200
+
+    human_mark = game["human_mark"]
+
+    if game["turn"] != human_mark:
+        return {"error": "Ce n'est pas à toi de jouer"}, 400
+
+    try:
+        pos = int(pos_raw)
+    except (TypeError, ValueError):
+        return {"error": "Coup invalide"}, 400
+
+    if pos < 0 or pos > 8 or game["board"][pos] != 0:
+        return {"error": "Coup invalide"}, 400
+
+    game["board"][pos] = human_mark
+    _log_event("move", game, by="human", mark=human_mark, pos=pos)
+    _update_terminal(game)
+
+    if game["done"]:
+        _credit_last_rl_if_needed(game)
+        return _public_game(game, with_stats), 200
+
+    game["turn"] *= -1
+    _bot_move(game)
+
+    return _public_game(game, with_stats), 200
+
+
+@contextmanager
+def _batched_save() -> Iterator[None]:
+    """
+    Pendant un lot, les sauvegardes de la Q-table sont regroupées en une seule, à la fin.
+    """
+    with _SAVE_LOCK:
+        _SAVE_STATE["defer"] += 1
+    try:
+        yield
+    finally:
+        with _SAVE_LOCK:
+            _SAVE_STATE["defer"] -= 1
+            flush = _SAVE_STATE["defer"] == 0 and _SAVE_STATE["dirty"]
+            if flush:
+                _SAVE_STATE["dirty"] = False
+        if flush:
+            agent.save()
+
+
+def _save_agent() -> None:
+    with _SAVE_LOCK:
+        if _SAVE_STATE["defer"] or agent.storage != "pickle":
+            _SAVE_STATE["dirty"] = True
+            return
+    agent.save()
+
+
+def _flush_save() -> None:
+    with _SAVE_LOCK:
+        flush = _SAVE_STATE["dirty"] and not _SAVE_STATE["defer"]
+        if flush:
+            _SAVE_STATE["dirty"] = False
+    if flush:
+        agent.save()
+
+
+def _periodic_save_loop() -> None:
+    while True:
+        time.sleep(QTABLE_SAVE_INTERVAL)
+        _flush_save()
+
+
+if agent.storage != "pickle":
+    threading.Thread(target=_periodic_save_loop, name="qtable-save", daemon=True).start()
+    atexit.register(_flush_save)
+
+
+def _get_replay_buffer(cfg: Dict[str, Any]) -> ReplayBuffer:
+    """
+    Réutilise le buffer global si taille et mode n'ont pas changé, sinon en recrée un.
+    """
+    global REPLAY
+
+    size = max(1, min(int(cfg.get("size", 10000)), 1000000))
+    prioritized = bool(cfg.get("prioritized", False))
+    if REPLAY is None or REPLAY.capacity != size or REPLAY.prioritized != prioritized:
+        REPLAY = ReplayBuffer(capacity=size, prioritized=prioritized)
+
+    REPLAY.replay_ratio = max(0.0, min(float(cfg.get("ratio", 1.0)), 32.0))
+    REPLAY.batch_size = max(1, int(cfg.get("batch_size", 32)))
+    return REPLAY
+
+
+def _public_game(game: Dict[str, Any], with_stats: bool = True) -> Dict[str, Any]:
     def cell(v: int) -> str:
         return "X" if v == 1 else ("O" if v == -1 else "")
 
@@ -315,10 +839,14 @@ def _public_game(game: Dict[str, Any]) -> Dict[str, Any]:
         bot_name = "Minimax"
     elif game["bot_kind"] == "remote":
         bot_name = "Remote API"
+    elif game["bot_kind"] == "alphabeta":
+        bot_name = "Alpha-beta"
+    elif game["bot_kind"] == "mcts":
+        bot_name = "MCTS"
     else:
         bot_name = "RL"
 
-    return {
+    out = {
         "id": game["id"],
         "board": [cell(v) for v in game["board"]],
         "done": game["done"],
@@ -333,6 +861,19 @@ def _public_game(game: Dict[str, Any]) -> Dict[str, Any]:
         "remote_url": game.get("remote_url", ""),
         "error": game.get("error", ""),
     }
+    if game.get("bot_info"):
+        # dernier coup d'un bot à recherche (mcts : playouts, playouts_per_s, ...)
+        out["bot_info"] = game["bot_info"]
+    if not with_stats:
+        # réponses batch : global_stats / epsilon une seule fois au niveau du lot
+        del out["epsilon"], out["global_stats"]
+    return out
+
+
+def _log_event(ev: str, game: Dict[str, Any], **fields: Any) -> None:
+    if EVENT_LOG is None:
+        return
+    EVENT_LOG.append({"ev": ev, "gid": game["id"], "ts": round(time.time(), 3), **fields})
 
 
 def _maybe_count_game_end(game: Dict[str, Any]) -> None:
@@ -349,6 +890,7 @@ def _maybe_count_game_end(game: Dict[str, Any]) -> None:
         STATS["human_wins"] += 1
 
     game["counted"] = True
+    _log_event("end", game, winner=game["winner"], error=game.get("error", ""))
 
 
 def _update_terminal(game: Dict[str, Any]) -> None:
@@ -365,7 +907,7 @@ def _update_terminal(game: Dict[str, Any]) -> None:
 
 
 def _credit_last_rl_if_needed(game: Dict[str, Any]) -> None:
-    if game["bot_kind"] != "rl":
+    if game["bot_kind"] != "rl" or not ONLINE_UPDATES:
         return
 
     last_s = game.get("last_bot_s")
@@ -380,44 +922,38 @@ def _credit_last_rl_if_needed(game: Dict[str, Any]) -> None:
     else:
         r = -1.0
 
-    agent.update(last_s, last_a, r=r, s_next=None, terminal=True)
-    agent.save()
+    if agent.episodic:
+        agent.learn_episode(agent.agent_steps(game["bot_moves"], r))
+        game["bot_moves"] = []
+    else:
+        agent.update(last_s, last_a, r=r, s_next=None, terminal=True)
+    _save_agent()
 
     game["last_bot_s"] = None
     game["last_bot_a"] = None
 
 
-def _board_to_remote_payload(board_abs: list[int], player_abs: int) -> Dict[str, Any]:
-    board = []
-    for v in board_abs:
-        if v == 1:
-            board.append("X")
-        elif v == -1:
-            board.append("O")
-        else:
-            board.append(" ")
-    you_are = "X" if player_abs == 1 else "O"
-    return {"board": board, "you_are": you_are}
-
-
-def _remote_move_board(board_abs: list[int], player_abs: int, remote_url: str) -> Optional[int]:
-    base = (remote_url or "").strip().rstrip("/")
-    if not base:
-        return None
-    url = f"{base}/move"
-    payload = _board_to_remote_payload(board_abs, player_abs)
-    try:
-        resp = requests.post(url, json=payload, timeout=2.5)
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        return int(data.get("idx"))
-    except Exception:
-        return None
-
-
 def _remote_move(game: Dict[str, Any]) -> Optional[int]:
-    return _remote_move_board(game["board"], game["bot_mark"], game.get("remote_url", ""))
+    return remote_move_board(game["board"], game["bot_mark"], game.get("remote_url", ""))
+
+
+def _mcts_move(game: Dict[str, Any]) -> int:
+    # un searcher par partie : l'arbre est réutilisé d'un coup à l'autre
+    opts = _engine_opts({})
+    searcher = game.get("mcts")
+    if searcher is None:
+        searcher = game["mcts"] = MCTSSearcher(get_geometry(3, 3), q_policy=opts["q_policy"], agent=agent)
+    budget_s = opts["think_ms"] / 1000.0 if opts["playouts"] <= 0 else 0.0
+    a, info = searcher.best_move(game["board"], game["bot_mark"], budget_s,
+                                 playouts=opts["playouts"], workers=opts["workers"])
+    game["bot_info"] = {
+        "playouts": int(info["playouts"]),
+        "playouts_per_s": round(info["playouts_per_s"], 1),
+        "reused_visits": int(info["reused_visits"]),
+        "workers": int(info["workers"]),
+        "win_rate": round(info["win_rate"], 3),
+    }
+    return a
 
 
 def _bot_move(game: Dict[str, Any]) -> None:
@@ -428,9 +964,15 @@ def _bot_move(game: Dict[str, Any]) -> None:
     if game["turn"] != bot_mark:
         return
 
-    if game["bot_kind"] == "minimax":
-        a = minimax_best_move(game["board"], bot_mark)
+    if game["bot_kind"] in ("minimax", "alphabeta", "mcts"):
+        if game["bot_kind"] == "minimax":
+            a = minimax_best_move(game["board"], bot_mark)
+        elif game["bot_kind"] == "alphabeta":
+            a, _ = choose_move(game["board"], bot_mark, "alphabeta", think_ms=BOT_THINK_MS)
+        else:
+            a = _mcts_move(game)
         game["board"][a] = bot_mark
+        _log_event("move", game, by="bot", mark=bot_mark, pos=a)
         _update_terminal(game)
         if not game["done"]:
             game["turn"] *= -1
@@ -453,6 +995,7 @@ def _bot_move(game: Dict[str, Any]) -> None:
             return
 
         game["board"][a] = bot_mark
+        _log_event("move", game, by="bot", mark=bot_mark, pos=a)
         _update_terminal(game)
         if not game["done"]:
             game["turn"] *= -1
@@ -464,10 +1007,17 @@ def _bot_move(game: Dict[str, Any]) -> None:
 
     game["last_bot_s"] = s
     game["last_bot_a"] = a
+    game["bot_moves"].append((s, a))
 
     game["board"][a] = bot_mark
+    _log_event("move", game, by="bot", mark=bot_mark, pos=a)
     _update_terminal(game)
 
+    if not ONLINE_UPDATES:
+        if not game["done"]:
+            game["turn"] *= -1
+        return
+
     if game["done"]:
         if game["winner"] == bot_mark:
             r = 1.0
@@ -476,19 +1026,27 @@ def _bot_move(game: Dict[str, Any]) -> None:
         else:
             r = -1.0
 
-        agent.update(s, a, r=r, s_next=None, terminal=True)
+        if agent.episodic:
+            # backup de toute la partie en une passe
+            agent.learn_episode(agent.agent_steps(game["bot_moves"], r))
+            game["bot_moves"] = []
+        else:
+            agent.update(s, a, r=r, s_next=None, terminal=True)
         agent.decay_epsilon()
-        agent.save()
+        _save_agent()
 
         game["last_bot_s"] = None
         game["last_bot_a"] = None
         return
 
-    next_player = -bot_mark
-    s_next = abs_to_state(game["board"], next_player)
-    agent.update(s, a, r=0.0, s_next=s_next, terminal=False)
+    if not agent.episodic:
+        next_player = -bot_mark
+        s_next = abs_to_state(game["board"], next_player)
+        agent.update(s, a, r=0.0, s_next=s_next, terminal=False)
     agent.decay_epsilon()
-    agent.save()
+    if not agent.episodic:
+        # en td_lambda / mc la table ne change qu'en fin de partie : rien à sauver ici
+        _save_agent()
 
     game["turn"] *= -1
 
@@ -0,0 +1,122 @@
+# eventlog.py
+from __future__ import annotations
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, IO, List, Optional
+
+
+class EventLog:
+    """
+    Journal append-only en NDJSON (un objet JSON par ligne).
+    - les lignes sont bufferisées en mémoire et écrites par paquets
+      (tous les `flush_every` événements, ou toutes les `flush_interval` secondes)
+    - un fichier par process (les workers gunicorn n'écrivent jamais dans le même fichier) ;
+      après un fork, le buffer hérité est vidé (le parent l'écrit) et le thread de flush
+      est relancé au premier append du nouveau process
+    - rotation par taille : le fichier courant est renommé <prefix>-<pid>-<ms>-<n>.ndjson
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "events",
+        max_bytes: int = 16 * 1024 * 1024,
+        flush_every: int = 64,
+        flush_interval: float = 2.0,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = int(max_bytes)
+        self.flush_every = max(1, int(flush_every))
+        self.flush_interval = float(flush_interval)
+
+        self._lock = threading.Lock()
+        self._buf: List[str] = []
+        self._fh: Optional[IO[str]] = None
+        self._pid = 0
+        self._flusher_pid = 0
+        self._rotations = 0
+        self._closed = threading.Event()
+
+        os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            self._start_flusher_locked()
+        atexit.register(self.close)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.prefix}-{os.getpid()}.ndjson")
+
+    def append(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._start_flusher_locked()
+            self._buf.append(line)
+            if len(self._buf) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    # ---------- interne ----------
+    def _start_flusher_locked(self) -> None:
+        # les threads ne survivent pas à un fork : un thread de flush par process
+        self._flusher_pid = os.getpid()
+        t = threading.Thread(target=self._flush_loop, name="eventlog-flush", daemon=True)
+        t.start()
+
+    def _after_fork(self) -> None:
+        # seul thread du process enfant : le verrou a pu être copié pris, les lignes
+        # bufferisées appartiennent au parent, le fichier ouvert est celui du parent
+        self._lock = threading.Lock()
+        self._buf = []
+        self._fh = None
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def _open_locked(self) -> IO[str]:
+        # après un fork (workers gunicorn), on rouvre le fichier du nouveau pid
+        if self._fh is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._fh = open(self.path, "a", encoding="utf-8")
+        return self._fh
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        fh = self._open_locked()
+        fh.write("\n".join(self._buf))
+        fh.write("\n")
+        fh.flush()
+        self._buf.clear()
+
+        if fh.tell() >= self.max_bytes:
+            fh.close()
+            self._fh = None
+            self._rotations += 1
+            rotated = os.path.join(
+                self.directory,
+                f"{self.prefix}-{self._pid}-{int(time.time() * 1000)}-{self._rotations}.ndjson",
+            )
+            os.replace(self.path, rotated)
@@ -0,0 +1,272 @@
+# loadtest.py
+"""
+Test de charge local (aucun accès réseau extérieur) :
+  - démarre app.py dans un process séparé (Q-table et journaux copiés dans un dossier temporaire),
+  - démarre un bot distant de substitution (même protocole que rl_remote_api.py : POST /move)
+    avec latence et taux d'erreur configurables,
+  - lance N joueurs humains simulés (/api/new puis /api/move jusqu'à la fin de partie)
+    et, en fond, des appels /api/train et /api/arena,
+  - affiche débit, percentiles de latence et erreurs par endpoint.
+
+Usage :
+  python loadtest.py --players 32 --duration 30 --remote-latency-ms 20 --remote-error-rate 0.02
+  python loadtest.py --json > rapport.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ------------------ serveurs ------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_app(port: int) -> None:
+    """Point d'entrée du process serveur : app Flask sur un serveur werkzeug multi-thread."""
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    sys.path.insert(0, HERE)
+    import app as app_module
+
+    make_server("127.0.0.1", port, app_module.app, threaded=True).serve_forever()
+
+
+def serve_remote(port: int, latency_ms: float, error_rate: float) -> None:
+    """
+    Bot distant de substitution : joue un coup légal au hasard après `latency_ms`
+    (± 50 %), et renvoie une erreur 500 avec la probabilité `error_rate`.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if latency_ms > 0:
+                time.sleep(latency_ms * random.uniform(0.5, 1.5) / 1000.0)
+
+            if self.path.rstrip("/") != "/move" or random.random() < error_rate:
+                self.send_response(500)
+                self.end_headers()
+                return
+
+            free = [i for i, v in enumerate(body.get("board", [])) if v not in ("X", "O")]
+            out = json.dumps({"idx": random.choice(free) if free else 0}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        try:
+            requests.get(url, timeout=0.5)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"serveur non joignable: {url}")
+
+
+# ------------------ mesures ------------------
+class Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def call(self, session: requests.Session, name: str, method: str, url: str, **kw: Any) -> Optional[Any]:
+        t0 = time.perf_counter()
+        ok = False
+        data = None
+        try:
+            resp = session.request(method, url, timeout=kw.pop("timeout", 30), **kw)
+            ok = resp.status_code == 200
+            if ok:
+                data = resp.json()
+        except (requests.RequestException, ValueError):
+            ok = False
+        dt = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self.latencies[name].append(dt)
+            if not ok:
+                self.errors[name] += 1
+        return data
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        def pct(xs: List[float], p: float) -> float:
+            if not xs:
+                return 0.0
+            return xs[min(len(xs) - 1, int(p / 100.0 * len(xs)))]
+
+        out = {}
+        for name in sorted(self.latencies):
+            xs = sorted(self.latencies[name])
+            out[name] = {
+                "requests": len(xs),
+                "errors": self.errors[name],
+                "rps": len(xs) / elapsed if elapsed > 0 else 0.0,
+                "p50_ms": pct(xs, 50),
+                "p90_ms": pct(xs, 90),
+                "p99_ms": pct(xs, 99),
+                "max_ms": xs[-1] if xs else 0.0,
+            }
+        return out
+
+
+# ------------------ clients simulés ------------------
+def player_loop(base: str, remote_url: str, rec: Recorder, stop: threading.Event,
+                bots: List[str], think_ms: float) -> None:
+    session = requests.Session()
+    while not stop.is_set():
+        bot = random.choice(bots)
+        params = {"bot": bot, "human_as": random.choice("XO")}
+        if bot == "remote":
+            params["remote_url"] = remote_url
+        game = rec.call(session, "GET /api/new", "GET", f"{base}/api/new", params=params)
+
+        while game and not game.get("done") and not stop.is_set():
+            free = [i for i, v in enumerate(game["board"]) if v == ""]
+            if not free:
+                break
+            if think_ms > 0:
+                time.sleep(think_ms * random.uniform(0.5, 1.5) / 1000.0)
+            game = rec.call(session, "POST /api/move", "POST", f"{base}/api/move",
+                            json={"game_id": game["id"], "pos": random.choice(free)})
+
+
+def background_loop(base: str, remote_url: str, rec: Recorder, stop: threading.Event,
+                    kind: str, every_s: float) -> None:
+    session = requests.Session()
+    while not stop.wait(every_s):
+        if kind == "train":
+            rec.call(session, "POST /api/train", "POST", f"{base}/api/train",
+                     json={"episodes": 200, "mode": random.choice(["selfplay", "minimax"])})
+        else:
+            rec.call(session, "POST /api/arena", "POST", f"{base}/api/arena",
+                     json={"x": "rl", "o": "remote", "games": 20, "remote_url": remote_url})
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    qtable = os.path.join(workdir, "qtable.pkl")
+    if os.path.exists(os.path.join(HERE, "qtable.pkl")):
+        shutil.copy(os.path.join(HERE, "qtable.pkl"), qtable)
+
+    app_port = _free_port()
+    remote_port = _free_port()
+    env = dict(os.environ, QTABLE_PATH=qtable, EVENT_LOG_DIR=os.path.join(workdir, "logs"))
+
+    procs = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-app", str(app_port)],
+                         cwd=HERE, env=env),
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-remote", str(remote_port),
+                          "--remote-latency-ms", str(args.remote_latency_ms),
+                          "--remote-error-rate", str(args.remote_error_rate)],
+                         cwd=HERE, env=env),
+    ]
+    base = f"http://127.0.0.1:{app_port}"
+    remote_url = f"http://127.0.0.1:{remote_port}"
+
+    try:
+        _wait_ready(f"{base}/api/epsilon")
+        _wait_ready(remote_url)
+
+        rec = Recorder()
+        stop = threading.Event()
+        bots = [b for b in args.bots.split(",") if b]
+        threads = [
+            threading.Thread(target=player_loop, args=(base, remote_url, rec, stop, bots, args.think_ms), daemon=True)
+            for _ in range(args.players)
+        ]
+        if args.train_every > 0:
+            threads.append(threading.Thread(
+                target=background_loop, args=(base, remote_url, rec, stop, "train", args.train_every), daemon=True))
+        if args.arena_every > 0:
+            threads.append(threading.Thread(
+                target=background_loop, args=(base, remote_url, rec, stop, "arena", args.arena_every), daemon=True))
+
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=35)
+        elapsed = time.perf_counter() - t0
+
+        return {"duration_s": elapsed, "players": args.players, "endpoints": rec.report(elapsed)}
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(rep: Dict[str, Any]) -> None:
+    print(f"durée {rep['duration_s']:.1f}s, {rep['players']} joueurs simulés")
+    print(f"{'endpoint':<18}{'req':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, e in rep["endpoints"].items():
+        print(f"{name:<18}{e['requests']:>8}{e['errors']:>6}{e['rps']:>9.1f}"
+              f"{e['p50_ms']:>9.1f}{e['p90_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['max_ms']:>9.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Test de charge local de l'API morpion.")
+    ap.add_argument("--players", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20.0, help="secondes")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="temps de réflexion moyen des joueurs")
+    ap.add_argument("--bots", default="rl,minimax,remote", help="adversaires tirés au hasard")
+    ap.add_argument("--train-every", type=float, default=5.0, help="secondes entre deux /api/train (0 = jamais)")
+    ap.add_argument("--arena-every", type=float, default=5.0, help="secondes entre deux /api/arena (0 = jamais)")
+    ap.add_argument("--remote-latency-ms", type=float, default=10.0)
+    ap.add_argument("--remote-error-rate", type=float, default=0.0)
+    ap.add_argument("--json", action="store_true", help="rapport JSON")
+    ap.add_argument("--serve-app", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--serve-remote", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve_app:
+        serve_app(args.serve_app)
+        return
+    if args.serve_remote:
+        serve_remote(args.serve_remote, args.remote_latency_ms, args.remote_error_rate)
+        return
+
+    rep = run(args)
+    if args.json:
+        print(json.dumps(rep, indent=2))
+    else:
+        print_report(rep)
+
+
+if __name__ == "__main__":
+    main()
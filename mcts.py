@@ -0,0 +1,350 @@
+# mcts.py
+"""
+Bot Monte Carlo Tree Search (UCT) sur la géométrie N×N, k-en-ligne de ngame.py.
+
+- budget par coup : temps (time_budget_s) et/ou nombre de playouts ;
+- réutilisation de l'arbre : d'un coup à l'autre, le searcher redescend dans le
+  sous-arbre correspondant au nouveau board (coups joués entre-temps) ;
+- politique Q-table optionnelle (3×3 uniquement) :
+    q_policy="rollout" -> rollouts epsilon-greedy sur la Q-table au lieu de l'aléatoire,
+    q_policy="prior"   -> sélection PUCT avec un prior softmax(Q / tau) ;
+- parallélisation à la racine : workers-1 process lancent chacun une recherche
+  indépendante sur la même position, les visites des fils de la racine sont sommées
+  avec celles de l'arbre local (seul l'arbre local est réutilisé au coup suivant).
+
+Récompenses dans [0, 1] du point de vue du joueur qui a joué le coup du noeud
+(victoire 1, nul 0.5, défaite 0).
+"""
+from __future__ import annotations
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ngame import Geometry, get_geometry
+from rl import QLearningAgent, QTable, abs_to_state, action_to_canonical, canonicalize
+
+Q_POLICIES = ("", "rollout", "prior")
+
+
+class Node:
+    __slots__ = ("move", "mover", "parent", "children", "visits", "wins", "prior", "result")
+
+    def __init__(self, move: int, mover: int, parent: Optional["Node"], prior: float = 1.0,
+                 result: Optional[int] = None):
+        self.move = move
+        self.mover = mover  # marque du joueur qui a joué `move` pour arriver ici
+        self.parent = parent
+        self.children: Optional[List["Node"]] = None  # None = pas encore développé
+        self.visits = 0
+        self.wins = 0.0
+        self.prior = prior
+        self.result = result  # None = non terminal, sinon vainqueur (0 = nul)
+
+
+class MCTSSearcher:
+    def __init__(
+        self,
+        geom: Geometry,
+        c: float = 1.4,
+        q_policy: str = "",
+        agent: Optional[QLearningAgent] = None,
+        rollout_epsilon: float = 0.1,
+        prior_tau: float = 0.25,
+        seed: Optional[int] = None,
+    ):
+        if q_policy not in Q_POLICIES:
+            raise ValueError(f"q_policy inconnue: {q_policy!r}")
+        self.geom = geom
+        self.c = c
+        # la Q-table ne couvre que le 3×3
+        self.q_policy = q_policy if (agent is not None and geom.n == 3 and geom.k == 3) else ""
+        self.agent = agent
+        self.rollout_epsilon = rollout_epsilon
+        self.prior_tau = prior_tau
+        self.rng = random.Random(seed)
+
+        self.root: Optional[Node] = None
+        self.root_board: List[int] = []
+        self._qcache: Dict[Tuple[Tuple[int, ...], int], Optional[Dict[int, float]]] = {}
+
+    # ---------- Q-table ----------
+    def _q_values(self, board: List[int], player: int) -> Optional[Dict[int, float]]:
+        key = (tuple(board), player)
+        if key in self._qcache:
+            return self._qcache[key]
+        s_c, t = canonicalize(abs_to_state(board, player))
+        row = self.agent.q.get(s_c)  # lecture seule : pas de _ensure_state
+        out = None
+        if row is not None:
+            out = {a: row[action_to_canonical(a, t)] for a, v in enumerate(board) if v == 0}
+        self._qcache[key] = out
+        return out
+
+    # ---------- arbre ----------
+    def _advance(self, board: List[int], player: int) -> int:
+        """
+        Redescend dans l'arbre existant jusqu'à `board` si possible, sinon repart d'une
+        racine vide. Renvoie le nombre de visites réutilisées.
+        """
+        root = self.root
+        if root is not None and len(self.root_board) == len(board):
+            old = self.root_board
+            if all(o == 0 or o == b for o, b in zip(old, board)):
+                played = {i for i, (o, b) in enumerate(zip(old, board)) if o == 0 and b != 0}
+                node = root
+                while played and node is not None:
+                    to_move = -node.mover
+                    nxt = None
+                    for ch in node.children or ():
+                        if ch.move in played and board[ch.move] == to_move:
+                            nxt = ch
+                            break
+                    node = nxt
+                    if node is not None:
+                        played.discard(node.move)
+                if node is not None and not played and -node.mover == player:
+                    node.parent = None
+                    self.root = node
+                    self.root_board = list(board)
+                    return node.visits
+
+        self.root = Node(-1, -player, None)
+        self.root_board = list(board)
+        return 0
+
+    def _expand(self, node: Node, board: List[int]) -> None:
+        g = self.geom
+        player = -node.mover
+        moves = [i for i, v in enumerate(board) if v == 0]
+        self.rng.shuffle(moves)
+
+        priors: Dict[int, float] = {}
+        if self.q_policy == "prior":
+            qv = self._q_values(board, player)
+            if qv:
+                peak = max(qv.values())
+                ex = {a: math.exp((q - peak) / self.prior_tau) for a, q in qv.items()}
+                tot = sum(ex.values())
+                priors = {a: e / tot for a, e in ex.items()}
+
+        full_after = len(moves) == 1
+        children = []
+        for m in moves:
+            board[m] = player
+            w = g.winner_at(board, m)
+            board[m] = 0
+            result = w if w else (0 if full_after else None)
+            children.append(Node(m, player, node, priors.get(m, 1.0 / len(moves)), result))
+        node.children = children
+
+    def _select(self, node: Node) -> Node:
+        children = node.children
+        if self.q_policy == "prior":
+            sqrt_n = math.sqrt(node.visits + 1)
+            best, best_s = children[0], -1e9
+            for ch in children:
+                q = ch.wins / ch.visits if ch.visits else 0.5
+                s = q + self.c * ch.prior * sqrt_n / (1 + ch.visits)
+                if s > best_s:
+                    best, best_s = ch, s
+            return best
+
+        log_n = math.log(node.visits) if node.visits > 0 else 0.0
+        c = self.c
+        best, best_s = children[0], -1.0
+        for ch in children:
+            if ch.visits == 0:
+                return ch
+            s = ch.wins / ch.visits + c * math.sqrt(log_n / ch.visits)
+            if s > best_s:
+                best, best_s = ch, s
+        return best
+
+    def _rollout(self, board: List[int], to_move: int, empties: List[int]) -> int:
+        g = self.geom
+        rng = self.rng
+        use_q = self.q_policy == "rollout"
+        while empties:
+            m = -1
+            if use_q and rng.random() >= self.rollout_epsilon:
+                qv = self._q_values(board, to_move)
+                if qv:
+                    m = max(qv, key=qv.__getitem__)
+            if m < 0:
+                m = empties[rng.randrange(len(empties))]
+            empties.remove(m)
+            board[m] = to_move
+            w = g.winner_at(board, m)
+            if w:
+                return w
+            to_move = -to_move
+        return 0
+
+    def _playout(self) -> None:
+        board = list(self.root_board)
+        node = self.root
+
+        while node.children is not None and node.result is None:
+            node = self._select(node)
+            board[node.move] = node.mover
+
+        if node.result is None:
+            self._expand(node, board)
+            node = self._select(node)
+            board[node.move] = node.mover
+
+        if node.result is not None:
+            winner = node.result
+        else:
+            winner = self._rollout(board, -node.mover, [i for i, v in enumerate(board) if v == 0])
+
+        while node is not None:
+            node.visits += 1
+            if winner == node.mover:
+                node.wins += 1.0
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+
+    def run(self, board: List[int], player: int, time_budget_s: float = 0.0, playouts: int = 0) -> Tuple[int, int]:
+        """Recherche sur la position ; renvoie (playouts joués, visites réutilisées)."""
+        if time_budget_s <= 0 and playouts <= 0:
+            raise ValueError("budget requis : time_budget_s et/ou playouts")
+        reused = self._advance(board, player)
+        self._qcache.clear()
+        if self.root.children is None:
+            self._expand(self.root, list(board))
+        if len(self.root.children) == 1:
+            return 0, reused  # coup forcé
+
+        deadline = time.perf_counter() + time_budget_s if time_budget_s > 0 else 0.0
+        done = 0
+        while True:
+            self._playout()
+            done += 1
+            if playouts > 0 and done >= playouts:
+                break
+            if deadline and time.perf_counter() >= deadline:
+                break
+        return done, reused
+
+    def root_visits(self) -> Dict[int, int]:
+        return {ch.move: ch.visits for ch in self.root.children or ()}
+
+    def best_move(
+        self,
+        board: List[int],
+        player: int,
+        time_budget_s: float = 0.2,
+        playouts: int = 0,
+        workers: int = 1,
+    ) -> Tuple[int, Dict[str, float]]:
+        """
+        Coup le plus visité (visites sommées sur tous les workers). Renvoie (coup, infos).
+        """
+        if not any(v == 0 for v in board):
+            raise ValueError("Aucun coup possible")
+        t0 = time.perf_counter()
+
+        futures = []
+        if workers > 1:
+            pool, size = _get_pool(workers - 1)
+            workers = min(workers, size + 1)
+            share = -(-playouts // workers) if playouts > 0 else 0
+            # copie de la table en mémoire (l'agent apprend entre deux coups, le fichier
+            # peut être en retard) : pas de table chargée une fois pour toutes dans les workers
+            qtable = None
+            if self.q_policy:
+                with self.agent._lock:
+                    qtable = {s_c: row[:] for s_c, row in self.agent.q.items()}
+            for _ in range(workers - 1):
+                futures.append(pool.submit(
+                    _worker_search, self.geom.n, self.geom.k, list(board), player, time_budget_s, share,
+                    self.c, self.q_policy, qtable, self.rng.getrandbits(32),
+                ))
+            playouts = share
+
+        done, reused = self.run(board, player, time_budget_s, playouts)
+        visits = self.root_visits()
+        for f in futures:
+            w_visits, w_done = f.result()
+            done += w_done
+            for m, v in w_visits.items():
+                visits[m] = visits.get(m, 0) + v
+
+        move = max(visits, key=visits.__getitem__)
+        chosen = next(ch for ch in self.root.children if ch.move == move)
+        elapsed = time.perf_counter() - t0
+        return move, {
+            "playouts": float(done),
+            "playouts_per_s": done / elapsed if elapsed > 0 else 0.0,
+            "elapsed_s": elapsed,
+            "workers": float(max(1, workers)),
+            "reused_visits": float(reused),
+            "root_visits": float(sum(visits.values())),
+            "win_rate": chosen.wins / chosen.visits if chosen.visits else 0.0,
+        }
+
+
+# ---------- parallélisation à la racine ----------
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_SIZE = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(size: int) -> Tuple[ProcessPoolExecutor, int]:
+    """
+    Pool partagé par tous les threads, créé une seule fois (au moins un process par cœur)
+    et jamais remplacé : un autre thread peut être en train d'y soumettre. Renvoie
+    (pool, nombre de process) ; l'appelant plafonne ses workers à cette taille.
+    """
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL_SIZE = max(size, os.cpu_count() or 1)
+            _POOL = ProcessPoolExecutor(max_workers=_POOL_SIZE)
+        return _POOL, _POOL_SIZE
+
+
+def _worker_search(
+    n: int,
+    k: int,
+    board: List[int],
+    player: int,
+    time_budget_s: float,
+    playouts: int,
+    c: float,
+    q_policy: str,
+    qtable: Optional[QTable],
+    seed: int,
+) -> Tuple[Dict[int, int], int]:
+    """Recherche indépendante dans un worker ; renvoie (visites des fils de la racine, playouts)."""
+    agent = None
+    if q_policy and qtable is not None:
+        agent = QLearningAgent(qtable_path=os.devnull)
+        agent.q = qtable
+    searcher = MCTSSearcher(get_geometry(n, k), c=c, q_policy=q_policy if agent else "", agent=agent, seed=seed)
+    done, _ = searcher.run(board, player, time_budget_s, playouts)
+    return searcher.root_visits(), done
+
+
+_SEARCHERS = threading.local()
+
+
+def get_searcher(n: int = 3, k: int = 3, q_policy: str = "", agent: Optional[QLearningAgent] = None) -> MCTSSearcher:
+    """
+    Searcher du thread courant (arena, tournois) : l'arbre est réutilisé tant que les
+    positions demandées se suivent, et repart de zéro sinon.
+    """
+    cache = getattr(_SEARCHERS, "by_key", None)
+    if cache is None:
+        cache = _SEARCHERS.by_key = {}
+    key = (n, k, q_policy, id(agent) if q_policy else 0)
+    s = cache.get(key)
+    if s is None:
+        s = cache[key] = MCTSSearcher(get_geometry(n, k), q_policy=q_policy, agent=agent)
+    return s
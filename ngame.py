@@ -0,0 +1,444 @@
+# ngame.py
+"""
+Moteur N×N, k-en-ligne (board absolu : X=+1, O=-1, vide=0, index = ligne * n + colonne).
+
+- Geometry : lignes gagnantes générées, lignes passant par chaque case, groupe de
+  symétries du carré (8 permutations) et clés de Zobrist.
+- AlphaBetaSearcher : negamax alpha-beta avec ordonnancement des coups (coup de la table
+  de transposition, heuristique historique, proximité du centre), table de transposition
+  bornée indexée par hash de Zobrist canonique (min sur les 8 symétries), et
+  approfondissement itératif sous budget de temps.
+
+Pour n = k = 3 on retrouve exactement le morpion de rl.py / minimax.py.
+"""
+from __future__ import annotations
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+WIN = 1_000_000
+_MATE_BAND = 10_000  # scores >= WIN - _MATE_BAND : victoire forcée (dépend de la profondeur)
+
+
+class Geometry:
+    def __init__(self, n: int = 3, k: int = 3, seed: int = 0x5EED):
+        if not (1 <= k <= n):
+            raise ValueError("il faut 1 <= k <= n")
+        self.n = n
+        self.k = k
+        self.cells = n * n
+
+        self.lines: List[Tuple[int, ...]] = []
+        for r in range(n):
+            for c in range(n):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    r_end = r + dr * (k - 1)
+                    c_end = c + dc * (k - 1)
+                    if 0 <= r_end < n and 0 <= c_end < n:
+                        self.lines.append(tuple((r + dr * i) * n + (c + dc * i) for i in range(k)))
+
+        self.cell_lines: List[List[int]] = [[] for _ in range(self.cells)]
+        for li, line in enumerate(self.lines):
+            for cell in line:
+                self.cell_lines[cell].append(li)
+
+        # symétries : t[j] = case d'origine de la case j du board transformé (comme rl._TRANSFORMS)
+        def rc(r: int, c: int) -> int:
+            return r * n + c
+
+        m = n - 1
+        maps = [
+            lambda r, c: (r, c),
+            lambda r, c: (m - c, r),      # rotation 90
+            lambda r, c: (m - r, m - c),  # rotation 180
+            lambda r, c: (c, m - r),      # rotation 270
+            lambda r, c: (r, m - c),      # miroir vertical
+            lambda r, c: (m - r, c),      # miroir horizontal
+            lambda r, c: (c, r),          # diag principale
+            lambda r, c: (m - c, m - r),  # diag secondaire
+        ]
+        self.syms: List[Tuple[int, ...]] = []
+        for f in maps:
+            self.syms.append(tuple(rc(*f(j // n, j % n)) for j in range(self.cells)))
+        self.inv_syms: List[List[int]] = []
+        for t in self.syms:
+            inv = [0] * self.cells
+            for new_idx, old_idx in enumerate(t):
+                inv[old_idx] = new_idx
+            self.inv_syms.append(inv)
+
+        rng = random.Random(seed)
+        # zobrist[case][0] pour X, [1] pour O
+        self.zobrist = [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(self.cells)]
+        self.side_key = rng.getrandbits(64)
+
+        # ordre statique : du centre vers les bords
+        half = (n - 1) / 2.0
+        self.center_order = sorted(
+            range(self.cells), key=lambda i: abs(i // n - half) + abs(i % n - half)
+        )
+        self.static_score = [0] * self.cells
+        for rank, cell in enumerate(self.center_order):
+            self.static_score[cell] = self.cells - rank
+
+    def winner(self, board: List[int]) -> int:
+        k = self.k
+        for line in self.lines:
+            s = 0
+            for i in line:
+                s += board[i]
+            if s == k:
+                return 1
+            if s == -k:
+                return -1
+        return 0
+
+    def winner_at(self, board: List[int], cell: int) -> int:
+        """Vainqueur éventuel en ne regardant que les lignes passant par `cell`."""
+        mark = board[cell]
+        if mark == 0:
+            return 0
+        target = mark * self.k
+        for li in self.cell_lines[cell]:
+            s = 0
+            for i in self.lines[li]:
+                s += board[i]
+            if s == target:
+                return mark
+        return 0
+
+    def is_full(self, board: List[int]) -> bool:
+        return all(v != 0 for v in board)
+
+
+_GEOMETRIES: Dict[Tuple[int, int], Geometry] = {}
+
+
+def get_geometry(n: int = 3, k: int = 3) -> Geometry:
+    g = _GEOMETRIES.get((n, k))
+    if g is None:
+        g = _GEOMETRIES[(n, k)] = Geometry(n, k)
+    return g
+
+
+class _Timeout(Exception):
+    pass
+
+
+# flags de la table de transposition
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+
+
+class AlphaBetaSearcher:
+    """
+    Searcher réutilisable pour une géométrie donnée (la table de transposition est
+    conservée d'un coup à l'autre, bornée à `tt_entries` entrées, éviction FIFO).
+    Non thread-safe : passer par get_searcher() (une instance par thread).
+    """
+
+    def __init__(self, geom: Geometry, tt_entries: int = 1 << 18):
+        self.geom = geom
+        self.tt_entries = max(1024, int(tt_entries))
+        self.tt: Dict[int, Tuple[int, int, int, int]] = {}
+        self.history = [0] * geom.cells
+
+        self._board: List[int] = []
+        self._hashes: List[int] = []
+        self._empties = 0
+        self._deadline = 0.0
+        self._root_move = -1
+        self.nodes = 0
+        self.tt_hits = 0
+
+    # ---------- hash ----------
+    def _reset_position(self, board: List[int], player: int) -> None:
+        g = self.geom
+        self._board = list(board)
+        self._empties = sum(1 for v in board if v == 0)
+        self._hashes = []
+        for inv in g.inv_syms:
+            h = 0
+            for cell, v in enumerate(board):
+                if v != 0:
+                    h ^= g.zobrist[inv[cell]][0 if v == 1 else 1]
+            self._hashes.append(h)
+        self._side = player
+
+    def _play(self, cell: int, mark: int) -> None:
+        g = self.geom
+        self._board[cell] = mark
+        self._empties -= 1
+        side = 0 if mark == 1 else 1
+        hs = self._hashes
+        for t, inv in enumerate(g.inv_syms):
+            hs[t] ^= g.zobrist[inv[cell]][side]
+
+    def _undo(self, cell: int, mark: int) -> None:
+        g = self.geom
+        self._board[cell] = 0
+        self._empties += 1
+        side = 0 if mark == 1 else 1
+        hs = self._hashes
+        for t, inv in enumerate(g.inv_syms):
+            hs[t] ^= g.zobrist[inv[cell]][side]
+
+    def _key(self, player: int) -> Tuple[int, int]:
+        hs = self._hashes
+        best_t = 0
+        best = hs[0]
+        for t in range(1, len(hs)):
+            if hs[t] < best:
+                best = hs[t]
+                best_t = t
+        if player == -1:
+            best ^= self.geom.side_key
+        return best, best_t
+
+    def _tt_store(self, key: int, depth: int, value: int, flag: int, move_c: int) -> None:
+        tt = self.tt
+        if key not in tt and len(tt) >= self.tt_entries:
+            del tt[next(iter(tt))]
+        tt[key] = (depth, value, flag, move_c)
+
+    # ---------- évaluation ----------
+    def _evaluate(self, player: int) -> int:
+        """Heuristique (point de vue de `player`) : lignes ouvertes pondérées par 10**marques."""
+        board = self._board
+        score = 0
+        for line in self.geom.lines:
+            x = o = 0
+            for i in line:
+                v = board[i]
+                if v == 1:
+                    x += 1
+                elif v == -1:
+                    o += 1
+            if x and not o:
+                score += 10 ** (x - 1)
+            elif o and not x:
+                score -= 10 ** (o - 1)
+        return score * player
+
+    def _ordered_moves(self, tt_move: int) -> List[int]:
+        board = self._board
+        hist = self.history
+        static = self.geom.static_score
+        moves = [c for c in self.geom.center_order if board[c] == 0]
+        moves.sort(key=lambda c: -(hist[c] * 64 + static[c]))
+        if tt_move >= 0 and board[tt_move] == 0:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+
+    # ---------- recherche ----------
+    def _negamax(self, player: int, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if (self.nodes & 1023) == 0 and self._deadline and time.perf_counter() > self._deadline:
+            raise _Timeout()
+
+        key, t = self._key(player)
+        tt_move = -1
+        entry = self.tt.get(key)
+        if entry is not None:
+            e_depth, e_val, e_flag, e_move = entry
+            if e_move >= 0:
+                tt_move = self.geom.syms[t][e_move]
+            # pas de coupure ni de resserrement de fenêtre à la racine : le coup joué
+            # doit venir de la recherche elle-même, pas d'une borne d'un coup précédent
+            if e_depth >= depth and ply > 0:
+                self.tt_hits += 1
+                # scores de victoire stockés relativement au noeud
+                if e_val >= WIN - _MATE_BAND:
+                    e_val -= ply
+                elif e_val <= -WIN + _MATE_BAND:
+                    e_val += ply
+                if e_flag == _EXACT:
+                    return e_val
+                if e_flag == _LOWER and e_val > alpha:
+                    alpha = e_val
+                elif e_flag == _UPPER and e_val < beta:
+                    beta = e_val
+                if alpha >= beta:
+                    return e_val
+        # flags stockés relativement à la fenêtre réellement cherchée
+        alpha0 = alpha
+
+        if depth == 0:
+            return self._evaluate(player)
+
+        g = self.geom
+        best = -WIN - 1
+        best_move = -1
+        for m in self._ordered_moves(tt_move):
+            self._play(m, player)
+            if g.winner_at(self._board, m):
+                score = WIN - ply - 1
+            elif self._empties == 0:
+                score = 0
+            else:
+                try:
+                    score = -self._negamax(-player, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    self._undo(m, player)
+                if score > best:
+                    best, best_move = score, m
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    self.history[m] += depth * depth
+                    break
+                continue
+            self._undo(m, player)
+            if score > best:
+                best, best_move = score, m
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.history[m] += depth * depth
+                break
+
+        if ply == 0:
+            self._root_move = best_move
+
+        if best <= alpha0:
+            flag = _UPPER
+        elif best >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        stored = best
+        if stored >= WIN - _MATE_BAND:
+            stored += ply
+        elif stored <= -WIN + _MATE_BAND:
+            stored -= ply
+        self._tt_store(key, depth, stored, flag, g.inv_syms[t][best_move] if best_move >= 0 else -1)
+        return best
+
+    def best_move(
+        self,
+        board: List[int],
+        player: int,
+        time_budget_s: float = 0.2,
+        max_depth: Optional[int] = None,
+    ) -> Tuple[int, Dict[str, float]]:
+        """
+        Approfondissement itératif jusqu'à résolution, `max_depth` ou épuisement du budget.
+        La profondeur 1 est toujours terminée. Renvoie (coup, infos).
+        """
+        empties = [i for i, v in enumerate(board) if v == 0]
+        if not empties:
+            raise ValueError("Aucun coup possible")
+
+        t0 = time.perf_counter()
+        self._reset_position(board, player)
+        self.nodes = 0
+        self.tt_hits = 0
+        self._root_move = -1
+        self.history = [h // 4 for h in self.history]
+
+        limit = len(empties) if max_depth is None else max(1, min(max_depth, len(empties)))
+        best_move = self._ordered_moves(-1)[0]
+        best_score = 0
+        depth_done = 0
+
+        for depth in range(1, limit + 1):
+            self._deadline = (t0 + time_budget_s) if depth > 1 and time_budget_s > 0 else 0.0
+            try:
+                score = self._negamax(player, depth, -WIN - 1, WIN + 1, 0)
+            except _Timeout:
+                self._reset_position(board, player)
+                break
+            if self._root_move >= 0:
+                best_move = self._root_move
+            best_score = score
+            depth_done = depth
+            if abs(score) >= WIN - _MATE_BAND:
+                break  # résultat forcé trouvé
+
+        self._deadline = 0.0
+        elapsed = time.perf_counter() - t0
+        return best_move, {
+            "depth": float(depth_done),
+            "score": float(best_score),
+            "nodes": float(self.nodes),
+            "tt_hits": float(self.tt_hits),
+            "tt_size": float(len(self.tt)),
+            "elapsed_s": elapsed,
+            "nodes_per_s": self.nodes / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+_SEARCHERS = threading.local()
+
+
+def get_searcher(n: int = 3, k: int = 3) -> AlphaBetaSearcher:
+    """Searcher du thread courant pour (n, k) (Flask sert les requêtes en multi-thread)."""
+    cache = getattr(_SEARCHERS, "by_geom", None)
+    if cache is None:
+        cache = _SEARCHERS.by_geom = {}
+    s = cache.get((n, k))
+    if s is None:
+        s = cache[(n, k)] = AlphaBetaSearcher(get_geometry(n, k))
+    return s
+
+
+def alphabeta_best_move(
+    board_abs: List[int],
+    player: int,
+    n: int = 3,
+    k: int = 3,
+    time_budget_s: float = 0.2,
+) -> int:
+    move, _ = get_searcher(n, k).best_move(board_abs, player, time_budget_s=time_budget_s)
+    return move
+
+
+def check_against_minimax(positions: int = 2000, seed: int = 0) -> int:
+    """
+    Non-régression 3×3 : un même searcher (réutilisé, comme via get_searcher) doit
+    jouer un coup de même valeur que minimax sur des positions aléatoires.
+    Renvoie le nombre de désaccords.
+    """
+    from minimax import minimax_best_move
+
+    g = get_geometry(3, 3)
+    searcher = AlphaBetaSearcher(g)
+    rng = random.Random(seed)
+
+    def outcome(board: List[int], player: int) -> int:
+        # issue du jeu parfait depuis board (player au trait), vue de X
+        board = list(board)
+        while not g.winner(board) and not g.is_full(board):
+            board[minimax_best_move(board, player)] = player
+            player = -player
+        return g.winner(board)
+
+    disagreements = 0
+    done = 0
+    while done < positions:
+        board = [0] * 9
+        player = 1
+        for _ in range(rng.randrange(0, 8)):
+            board[rng.choice([i for i, v in enumerate(board) if v == 0])] = player
+            player = -player
+        if g.winner(board) or g.is_full(board):
+            continue
+        done += 1
+        move, _ = searcher.best_move(board, player, time_budget_s=0.0)
+        after = list(board)
+        after[move] = player
+        ref = list(board)
+        ref[minimax_best_move(board, player)] = player
+        if outcome(after, -player) != outcome(ref, -player):
+            disagreements += 1
+    return disagreements
+
+
+if __name__ == "__main__":
+    import sys
+
+    n_pos = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bad = check_against_minimax(n_pos)
+    print(f"{bad} désaccord(s) avec minimax sur {n_pos} positions")
+    sys.exit(1 if bad else 0)
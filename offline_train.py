@@ -0,0 +1,137 @@
+# offline_train.py
+"""
+Ré-entraînement hors ligne à partir du journal de parties (voir eventlog.py / app.py).
+
+Les fichiers NDJSON sont lus en streaming, du plus ancien au plus récent ; chaque partie
+terminée (sans erreur) est rejouée coup par coup et passée à QLearningAgent.update
+(ou learn_episode en mode td_lambda / mc), comme en self-play : les coups des deux
+camps sont appris, du point de vue du joueur qui joue.
+
+Usage :
+  python offline_train.py logs/ --qtable qtable.pkl
+  python offline_train.py logs/ --qtable rebuilt.pkl --from-scratch --passes 3
+"""
+from __future__ import annotations
+import argparse
+import glob
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from rl import QLearningAgent, LEARNING_MODES, Step, abs_to_state, check_winner_abs, is_full_abs
+
+
+def log_files(paths: Iterable[str]) -> List[str]:
+    """
+    Dossiers -> fichiers *.ndjson qu'ils contiennent. Tri par date de modification
+    (les fichiers tournés sont plus anciens que le fichier courant).
+    """
+    files: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(glob.glob(os.path.join(p, "*.ndjson")))
+        else:
+            files.append(p)
+    return sorted(set(files), key=lambda f: (os.path.getmtime(f), f))
+
+
+def iter_events(files: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # ligne tronquée (crash pendant un flush)
+
+
+def iter_games(events: Iterable[Dict[str, Any]]) -> Iterator[Tuple[List[Tuple[int, int]], int]]:
+    """
+    Regroupe les événements par partie ; renvoie (coups [(mark, pos)], winner) pour
+    chaque partie terminée sans erreur. Seules les parties en cours restent en mémoire.
+    """
+    open_games: Dict[str, List[Tuple[int, int]]] = {}
+    for ev in events:
+        kind = ev.get("ev")
+        gid = ev.get("gid")
+        if kind == "new":
+            open_games[gid] = []
+        elif kind == "move":
+            if gid in open_games:
+                open_games[gid].append((int(ev["mark"]), int(ev["pos"])))
+        elif kind == "end":
+            moves = open_games.pop(gid, None)
+            if moves and not ev.get("error"):
+                yield moves, int(ev.get("winner", 0))
+
+
+def learn_game(agent: QLearningAgent, moves: List[Tuple[int, int]]) -> bool:
+    """
+    Rejoue une partie et applique les backups. Renvoie False si la séquence est incohérente.
+    """
+    board = [0] * 9
+    steps: List[Step] = []
+    for i, (mark, pos) in enumerate(moves):
+        if not (0 <= pos <= 8) or board[pos] != 0:
+            return False
+        s = abs_to_state(board, mark)
+        board[pos] = mark
+
+        winner = check_winner_abs(board)
+        if winner != 0 or is_full_abs(board):
+            steps.append((s, pos, 1.0 if winner == mark else 0.0, None, -1))
+            break
+        if i + 1 == len(moves):
+            return False  # partie marquée finie mais board non terminal
+        steps.append((s, pos, 0.0, abs_to_state(board, -mark), -1))
+
+    if agent.episodic:
+        agent.learn_episode(steps)
+    else:
+        for s, a, r, s_next, _ in steps:
+            agent.update(s, a, r=r, s_next=s_next, terminal=s_next is None)
+    return True
+
+
+def train_from_logs(agent: QLearningAgent, paths: Iterable[str], passes: int = 1) -> Dict[str, int]:
+    files = log_files(paths)
+    games = 0
+    skipped = 0
+    for _ in range(max(1, passes)):
+        for moves, _winner in iter_games(iter_events(files)):
+            if learn_game(agent, moves):
+                games += 1
+            else:
+                skipped += 1
+    return {"files": len(files), "games": games, "skipped": skipped, "qtable_states": len(agent.q)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Ré-entraîne la Q-table depuis le journal de parties.")
+    ap.add_argument("paths", nargs="+", help="fichiers .ndjson ou dossiers de logs")
+    ap.add_argument("--qtable", default="qtable.pkl")
+    ap.add_argument("--from-scratch", action="store_true", help="ignore la Q-table existante")
+    ap.add_argument("--passes", type=int, default=1)
+    ap.add_argument("--learning-mode", choices=LEARNING_MODES, default="td0")
+    ap.add_argument("--adaptive-alpha", action="store_true")
+    args = ap.parse_args()
+
+    agent = QLearningAgent(
+        qtable_path=args.qtable,
+        learning_mode=args.learning_mode,
+        adaptive_alpha=args.adaptive_alpha,
+    )
+    if args.from_scratch:
+        agent.q = {}
+        agent.visits = {}  # sinon les visites semées par load() freinent adaptive_alpha
+
+    stats = train_from_logs(agent, args.paths, passes=args.passes)
+    agent.save()
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# players.py
+"""
+Choix de coup des bots sur un board absolu (X=+1, O=-1, vide=0), sans état Flask :
+utilisé par l'arena (app.py) et par les tournois (tournament.py, y compris dans
+des process workers).
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+import requests
+
+from rl import QLearningAgent, abs_to_state
+from minimax import minimax_best_move
+from ngame import get_searcher
+import mcts
+
+BOT_KINDS = ("rl", "minimax", "remote", "alphabeta", "mcts")
+# bots capables de jouer sur un board N×N, k-en-ligne (les autres sont limités au 3×3)
+ENGINE_KINDS = ("alphabeta", "mcts")
+
+
+def board_to_remote_payload(board_abs: list[int], player_abs: int) -> Dict[str, Any]:
+    board = []
+    for v in board_abs:
+        if v == 1:
+            board.append("X")
+        elif v == -1:
+            board.append("O")
+        else:
+            board.append(" ")
+    you_are = "X" if player_abs == 1 else "O"
+    return {"board": board, "you_are": you_are}
+
+
+def remote_move_board(
+    board_abs: list[int],
+    player_abs: int,
+    remote_url: str,
+    session: Optional[requests.Session] = None,
+) -> Optional[int]:
+    base = (remote_url or "").strip().rstrip("/")
+    if not base:
+        return None
+    url = f"{base}/move"
+    payload = board_to_remote_payload(board_abs, player_abs)
+    try:
+        post = session.post if session is not None else requests.post
+        resp = post(url, json=payload, timeout=2.5)
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        return int(data.get("idx"))
+    except Exception:
+        return None
+
+
+def choose_move(
+    board_abs: list[int],
+    player_abs: int,
+    kind: str,
+    agent: Optional[QLearningAgent] = None,
+    remote_url: str = "",
+    session: Optional[requests.Session] = None,
+    n: int = 3,
+    k: int = 3,
+    think_ms: float = 200.0,
+    playouts: int = 0,
+    workers: int = 1,
+    q_policy: str = "",
+) -> Tuple[int, str]:
+    """
+    Renvoie (coup, "") ou (0, message d'erreur).
+    n, k, think_ms : taille du board, alignement gagnant et budget par coup (ENGINE_KINDS).
+    playouts, workers, q_policy : options MCTS (voir mcts.py ; q_policy utilise `agent`).
+    """
+    if kind == "mcts":
+        searcher = mcts.get_searcher(n, k, q_policy, agent)
+        budget_s = think_ms / 1000.0 if playouts <= 0 else 0.0
+        idx, _ = searcher.best_move(board_abs, player_abs, budget_s, playouts=playouts, workers=workers)
+        return idx, ""
+
+    if kind == "alphabeta":
+        idx, _ = get_searcher(n, k).best_move(board_abs, player_abs, time_budget_s=think_ms / 1000.0)
+        return idx, ""
+
+    if kind == "minimax":
+        return minimax_best_move(board_abs, player_abs), ""
+
+    if kind == "rl":
+        # évaluation : greedy, pas d'exploration
+        s = abs_to_state(board_abs, player_abs)
+        idx = agent.choose_action(s, epsilon_override=0.0)
+        if idx < 0 or idx > 8 or board_abs[idx] != 0:
+            return 0, "RL a produit un coup illégal (inattendu)."
+        return idx, ""
+
+    # remote
+    idx = remote_move_board(board_abs, player_abs, remote_url, session=session)
+    if idx is None:
+        return 0, "Remote API injoignable (timeout/réponse invalide)."
+    if idx < 0 or idx > 8 or board_abs[idx] != 0:
+        return 0, "Remote API a renvoyé un coup illégal."
+    return idx, ""
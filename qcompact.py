@@ -0,0 +1,163 @@
+# qcompact.py
+"""
+Compaction de la Q-table :
+  - supprime les lignes terminales et les lignes jamais mises à jour (tout à 0),
+  - ne stocke que les cases légales de chaque état (les autres valent 0 au chargement),
+  - stocke les états en code base 3 sur 16 bits et les valeurs en float32 / float16 / int8
+    (int8 : valeur = q * scale, scale = 127 / max|Q|).
+
+Le format compact est un dict picklé reconnu par QLearningAgent.load().
+
+Usage :
+  python qcompact.py qtable.pkl -o qtable.compact.pkl --dtype float16
+"""
+from __future__ import annotations
+import argparse
+import json
+import pickle
+import struct
+from array import array
+from typing import Any, Dict, List, Optional
+
+from rl import QTable, State, available_actions_state, check_winner_abs, decode_state, encode_state
+
+FORMAT = "qcompact/1"
+DTYPES = ("float32", "float16", "int8")
+
+
+def is_compact(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get("format") == FORMAT
+
+
+def is_terminal_state(state: State) -> bool:
+    return check_winner_abs(list(state)) != 0 or all(v != 0 for v in state)
+
+
+def _greedy(row: List[float], legal: List[int]) -> int:
+    return max(legal, key=row.__getitem__)
+
+
+def compact(q: QTable, dtype: str = "float32") -> Dict[str, Any]:
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype inconnu: {dtype!r}")
+
+    codes = array("H")
+    values: List[float] = []
+    for state in sorted(q, key=encode_state):
+        if is_terminal_state(state):
+            continue
+        row = q[state]
+        legal = available_actions_state(state)
+        vals = [row[i] for i in legal]
+        if not any(vals):
+            continue
+        codes.append(encode_state(state))
+        values.extend(vals)
+
+    scale = 1.0
+    if dtype == "float32":
+        packed = array("f", values).tobytes()
+    elif dtype == "float16":
+        packed = struct.pack(f"<{len(values)}e", *values)
+    else:
+        peak = max((abs(v) for v in values), default=0.0)
+        scale = 127.0 / peak if peak > 0 else 1.0
+        packed = array("b", [max(-127, min(127, round(v * scale))) for v in values]).tobytes()
+
+    return {"format": FORMAT, "dtype": dtype, "scale": scale, "codes": codes.tobytes(), "values": packed}
+
+
+def expand(payload: Dict[str, Any]) -> QTable:
+    codes = array("H")
+    codes.frombytes(payload["codes"])
+
+    dtype = payload["dtype"]
+    raw = payload["values"]
+    if dtype == "float32":
+        arr = array("f")
+        arr.frombytes(raw)
+        values: List[float] = arr.tolist()
+    elif dtype == "float16":
+        values = list(struct.unpack(f"<{len(raw) // 2}e", raw))
+    else:
+        arr_b = array("b")
+        arr_b.frombytes(raw)
+        scale = float(payload["scale"])
+        values = [v / scale for v in arr_b]
+
+    q: QTable = {}
+    pos = 0
+    for code in codes:
+        state = decode_state(code)
+        row = [0.0] * 9
+        for i in available_actions_state(state):
+            row[i] = values[pos]
+            pos += 1
+        q[state] = row
+    return q
+
+
+def policy_changes(q_ref: QTable, q_new: QTable) -> int:
+    """
+    Nombre d'états non terminaux de q_ref dont l'action greedy diffère dans q_new
+    (une ligne absente vaut 0 partout, comme après _ensure_state).
+    """
+    changed = 0
+    zeros = [0.0] * 9
+    for state, row in q_ref.items():
+        if is_terminal_state(state):
+            continue
+        legal = available_actions_state(state)
+        if not legal:
+            continue
+        if _greedy(row, legal) != _greedy(q_new.get(state, zeros), legal):
+            changed += 1
+    return changed
+
+
+def report(q: QTable, payload: Dict[str, Any], q_new: Optional[QTable] = None) -> Dict[str, Any]:
+    if q_new is None:
+        q_new = expand(payload)
+    before = len(pickle.dumps(q, protocol=pickle.HIGHEST_PROTOCOL))
+    after = len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    terminal = sum(1 for s in q if is_terminal_state(s))
+    return {
+        "dtype": payload["dtype"],
+        "rows_before": len(q),
+        "rows_after": len(q_new),
+        "rows_terminal": terminal,
+        "rows_untouched": len(q) - terminal - len(q_new),
+        "bytes_before": before,
+        "bytes_after": after,
+        "ratio": after / before if before else 0.0,
+        "policy_changes": policy_changes(q, q_new),
+        "max_abs_error": max(
+            (abs(q[s][i] - q_new.get(s, [0.0] * 9)[i])
+             for s in q if not is_terminal_state(s) for i in available_actions_state(s)),
+            default=0.0,
+        ),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compacte une Q-table (qtable.pkl).")
+    ap.add_argument("src")
+    ap.add_argument("-o", "--out", help="fichier compact à écrire (sinon : rapport seul)")
+    ap.add_argument("--dtype", choices=DTYPES, default="float32")
+    args = ap.parse_args()
+
+    with open(args.src, "rb") as f:
+        q = pickle.load(f)
+    if is_compact(q):
+        q = expand(q)
+
+    payload = compact(q, args.dtype)
+    print(json.dumps(report(q, payload), indent=2))
+
+    if args.out:
+        with open(args.out, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+if __name__ == "__main__":
+    main()
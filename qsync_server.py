@@ -0,0 +1,236 @@
+# qsync_server.py
+"""
+Agrégateur de Q-tables multi-nœuds.
+
+Chaque nœud (QLearningAgent.sync) pousse ses deltas depuis son dernier échange :
+[code état, action, ΔQ, Δvisites, Q local, visites de base]. L'agrégateur fusionne par
+moyenne pondérée par les visites : si m visites d'autres nœuds sont arrivées depuis la
+base du nœud, Q <- (m * Q + Δvisites * Q local) / (m + Δvisites). Un nœud seul retrouve
+exactement sa valeur, plusieurs nœuds qui tirent Q(s, a) vers la même cible sont moyennés
+(et non empilés) : Q reste dans l'enveloppe des valeurs des nœuds. Les anciens deltas à
+4 champs sont additionnés. Chaque ligne modifiée est versionnée et les nœuds récupèrent
+ensuite uniquement les lignes modifiées depuis leur version.
+
+Endpoints :
+  POST /seed  {"rows": [[code, [9 Q], [9 visites]], ...]}   appliqué seulement si la table est vide
+  POST /push  {"epoch": .., "deltas": [[code, action, dq, dn, q, n_base], ...]}   409 si epoch périmée
+  GET  /pull?since=<version>  -> {"epoch", "version", "rows": [[code, [9 Q], [9 visites]], ...]}
+  GET  /stats
+
+Test local avec plusieurs process :
+  python qsync_server.py --port 9200 --state /tmp/qsync.pkl
+  python qsync_server.py --node http://127.0.0.1:9200 --rounds 20 --episodes 200   (x N terminaux)
+
+Vérification (agrégateur + N nœuds dans un seul process, code 1 si |Q| > 1 après fusion) :
+  python qsync_server.py --check 4 --rounds 6 --episodes 300
+"""
+from __future__ import annotations
+import argparse
+import os
+import pickle
+import threading
+import time
+import uuid
+from typing import Any, Dict
+
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+_LOCK = threading.Lock()
+STATE: Dict[str, Any] = {
+    "epoch": uuid.uuid4().hex,
+    "version": 0,
+    "q": {},           # code -> [9 floats]
+    "visits": {},      # code -> [9 ints]
+    "row_version": {},  # code -> version de la dernière modification
+    "pushes": 0,
+}
+
+
+def _touch(code: int, version: int) -> None:
+    STATE["row_version"][code] = version
+
+
+@app.post("/seed")
+def seed():
+    data = request.get_json(force=True) if request.data else {}
+    rows = data.get("rows") or []
+    with _LOCK:
+        if STATE["q"] or not rows:
+            return jsonify({"ok": True, "seeded": False, "version": STATE["version"]})
+        STATE["version"] += 1
+        v = STATE["version"]
+        for code, values, counts in rows:
+            code = int(code)
+            STATE["q"][code] = [float(x) for x in values]
+            STATE["visits"][code] = [int(x) for x in counts]
+            _touch(code, v)
+        return jsonify({"ok": True, "seeded": True, "version": v})
+
+
+@app.post("/push")
+def push():
+    data = request.get_json(force=True) if request.data else {}
+    deltas = data.get("deltas") or []
+    with _LOCK:
+        if data.get("epoch") != STATE["epoch"]:
+            return jsonify({"ok": False, "error": "epoch périmée", "epoch": STATE["epoch"]}), 409
+        if not deltas:
+            return jsonify({"ok": True, "version": STATE["version"]})
+
+        STATE["version"] += 1
+        v = STATE["version"]
+        q = STATE["q"]
+        visits = STATE["visits"]
+        for d in deltas:
+            code = int(d[0])
+            a = int(d[1])
+            dn = int(d[3])
+            row = q.get(code)
+            if row is None:
+                row = q[code] = [0.0] * 9
+                visits[code] = [0] * 9
+            if len(d) >= 6:
+                # visites arrivées d'autres nœuds depuis la base de celui-ci
+                others = max(0, visits[code][a] - int(d[5]))
+                w = max(1, dn)
+                row[a] += w / (others + w) * (float(d[4]) - row[a])
+            else:
+                row[a] += float(d[2])
+            visits[code][a] += dn
+            _touch(code, v)
+        STATE["pushes"] += 1
+        return jsonify({"ok": True, "version": v})
+
+
+@app.get("/pull")
+def pull():
+    since = int(request.args.get("since", 0))
+    with _LOCK:
+        rows = [
+            [code, STATE["q"][code], STATE["visits"][code]]
+            for code, rv in STATE["row_version"].items()
+            if rv > since
+        ]
+        return jsonify({"epoch": STATE["epoch"], "version": STATE["version"], "rows": rows})
+
+
+@app.get("/stats")
+def stats():
+    with _LOCK:
+        return jsonify({
+            "epoch": STATE["epoch"],
+            "version": STATE["version"],
+            "rows": len(STATE["q"]),
+            "pushes": STATE["pushes"],
+        })
+
+
+# ------------------ persistance ------------------
+def load_state(path: str) -> None:
+    try:
+        with open(path, "rb") as f:
+            STATE.update(pickle.load(f))
+    except FileNotFoundError:
+        pass
+
+
+def save_state(path: str) -> None:
+    with _LOCK:
+        data = pickle.dumps(STATE, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _save_loop(path: str, every_s: float) -> None:
+    last = -1
+    while True:
+        time.sleep(every_s)
+        if STATE["version"] != last:
+            last = STATE["version"]
+            save_state(path)
+
+
+# ------------------ nœud de test ------------------
+def run_node(url: str, rounds: int, episodes: int, qtable: str) -> None:
+    from rl import QLearningAgent
+
+    agent = QLearningAgent(qtable_path=qtable, sync_url=url)
+    for i in range(rounds):
+        stats = agent.self_play(episodes=episodes)
+        res = agent.sync()
+        print(f"[node {os.getpid()}] round {i + 1}/{rounds} draw_rate={stats['draw_rate']:.3f} "
+              f"pushed={res['pushed']} pulled={res['pulled']} version={res['version']}", flush=True)
+
+
+def run_check(nodes: int, rounds: int, episodes: int) -> int:
+    """
+    Agrégateur local + `nodes` agents (train_vs_minimax puis sync à chaque round) ;
+    renvoie le nombre de valeurs fusionnées hors de [-1, 1] (récompenses ±1, gamma < 1).
+    """
+    import logging
+    import socket
+    from werkzeug.serving import make_server
+    from rl import QLearningAgent
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{port}"
+
+    agents = []
+    for _ in range(nodes):
+        ag = QLearningAgent(qtable_path=os.devnull, sync_url=url)
+        ag.q, ag.visits = {}, {}
+        agents.append(ag)
+    try:
+        for _ in range(rounds):
+            for ag in agents:
+                ag.train_vs_minimax(episodes=episodes)
+                ag.sync()
+    finally:
+        server.shutdown()
+
+    with _LOCK:
+        values = [x for row in STATE["q"].values() for x in row]
+    out = sum(1 for x in values if abs(x) > 1.0 + 1e-9)
+    print(f"{nodes} nœuds x {rounds} rounds : {len(STATE['q'])} lignes, "
+          f"Q dans [{min(values, default=0.0):.3f}, {max(values, default=0.0):.3f}], {out} hors de [-1, 1]")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Agrégateur de Q-tables (ou nœud de test avec --node).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9200)
+    ap.add_argument("--state", help="fichier de persistance de la table fusionnée")
+    ap.add_argument("--save-every", type=float, default=10.0)
+    ap.add_argument("--node", metavar="URL", help="lance un nœud d'entraînement synchronisé avec URL")
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--episodes", type=int, default=200)
+    ap.add_argument("--qtable", default="", help="(nœud) Q-table locale, vide = table neuve en mémoire")
+    ap.add_argument("--check", type=int, metavar="N", help="vérifie la fusion avec N nœuds en process")
+    args = ap.parse_args()
+
+    if args.check:
+        raise SystemExit(1 if run_check(args.check, args.rounds, args.episodes) else 0)
+
+    if args.node:
+        run_node(args.node, args.rounds, args.episodes, args.qtable or os.devnull)
+        return
+
+    if args.state:
+        load_state(args.state)
+        threading.Thread(target=_save_loop, args=(args.state, args.save_every), daemon=True).start()
+
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# replay_buffer.py
+from __future__ import annotations
+from array import array
+import random
+from typing import List, Optional, Sequence, Tuple
+
+from rl import State, Transition, encode_state, decode_state
+
+# Pas d'état suivant (transition terminale) : valeur hors de la plage des codes (< 3**9)
+_NO_STATE = 0xFFFF
+
+
+class ReplayBuffer:
+    """
+    Buffer circulaire borné de transitions (s, a, r, s_next, terminal), stockées
+    sous forme encodée dans des arrays typés :
+      - s, s_next : code base 3 sur 16 bits (voir rl.encode_state)
+      - a         : int8
+      - r         : float32
+      - terminal  : uint8
+
+    Échantillonnage uniforme, ou prioritaire (p_i ** prio_alpha, via un sum-tree).
+    replay_ratio = nombre de transitions rejouées par transition nouvelle.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        prioritized: bool = False,
+        prio_alpha: float = 0.6,
+        prio_eps: float = 1e-3,
+        replay_ratio: float = 1.0,
+        batch_size: int = 32,
+    ):
+        self.capacity = max(1, int(capacity))
+        self.prioritized = bool(prioritized)
+        self.prio_alpha = float(prio_alpha)
+        self.prio_eps = float(prio_eps)
+        self.replay_ratio = max(0.0, float(replay_ratio))
+        self.batch_size = max(1, int(batch_size))
+
+        self._s = array("H", [0] * self.capacity)
+        self._a = array("b", [0] * self.capacity)
+        self._r = array("f", [0.0] * self.capacity)
+        self._s2 = array("H", [0] * self.capacity)
+        self._t = array("B", [0] * self.capacity)
+
+        self._next = 0
+        self._size = 0
+        self._credit = 0.0  # fraction de replay reportée d'un épisode à l'autre
+
+        # sum-tree : feuilles en [tree_cap, 2 * tree_cap), tree_cap puissance de 2
+        self._tree_cap = 1
+        while self._tree_cap < self.capacity:
+            self._tree_cap *= 2
+        self._tree = array("d", [0.0] * (2 * self._tree_cap)) if self.prioritized else None
+        self._max_prio = 1.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, s: State, a: int, r: float, s_next: Optional[State], terminal: bool) -> None:
+        i = self._next
+        self._s[i] = encode_state(s)
+        self._a[i] = a
+        self._r[i] = r
+        self._s2[i] = _NO_STATE if s_next is None else encode_state(s_next)
+        self._t[i] = 1 if terminal else 0
+
+        if self._tree is not None:
+            self._set_prio(i, self._max_prio)
+
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def get(self, i: int) -> Transition:
+        code2 = self._s2[i]
+        s_next = None if code2 == _NO_STATE else decode_state(code2)
+        return decode_state(self._s[i]), self._a[i], float(self._r[i]), s_next, bool(self._t[i])
+
+    def sample(self, k: int) -> Tuple[List[int], List[Transition]]:
+        if self._size == 0:
+            return [], []
+        if self._tree is None:
+            idxs = [random.randrange(self._size) for _ in range(k)]
+        else:
+            total = self._tree[1]
+            idxs = [self._find(random.random() * total) for _ in range(k)]
+        return idxs, [self.get(i) for i in idxs]
+
+    def update_priorities(self, idxs: Sequence[int], td_errors: Sequence[float]) -> None:
+        if self._tree is None:
+            return
+        for i, err in zip(idxs, td_errors):
+            p = (abs(err) + self.prio_eps) ** self.prio_alpha
+            if p > self._max_prio:
+                self._max_prio = p
+            self._set_prio(i, p)
+
+    def replay_count(self, n_new: int) -> int:
+        """
+        Nombre de transitions à rejouer après l'ajout de `n_new` transitions.
+        """
+        self._credit += self.replay_ratio * n_new
+        n = int(self._credit)
+        self._credit -= n
+        return n
+
+    # ---------- sum-tree ----------
+    def _set_prio(self, i: int, p: float) -> None:
+        tree = self._tree
+        j = i + self._tree_cap
+        delta = p - tree[j]
+        while j >= 1:
+            tree[j] += delta
+            j //= 2
+
+    def _find(self, mass: float) -> int:
+        tree = self._tree
+        j = 1
+        while j < self._tree_cap:
+            left = 2 * j
+            if mass < tree[left]:
+                j = left
+            else:
+                mass -= tree[left]
+                j = left + 1
+        return min(j - self._tree_cap, self._size - 1)
@@ -1,13 +1,30 @@
 # rl.py
 from __future__ import annotations
 from dataclasses import dataclass
+from collections import deque
+import math
 import random
 import pickle
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Tuple, Optional
+
+if TYPE_CHECKING:
+    from replay_buffer import ReplayBuffer
 
 State = Tuple[int, ...]  # -1,0,1 du point de vue du joueur courant
 QTable = Dict[State, List[float]]
 
+# Pas d'épisode : (s, a, r, s_next, sign)
+#   s_next = None si terminal
+#   sign = -1 si s_next est du point de vue de l'adversaire (self-play),
+#          +1 si s_next est le prochain état du même joueur (agent seul).
+Step = Tuple[State, int, float, Optional[State], int]
+
+# Transition à un pas, au format de QLearningAgent.update : (s, a, r, s_next, terminal)
+Transition = Tuple[State, int, float, Optional[State], bool]
+
+LEARNING_MODES = ("td0", "td_lambda", "mc")
+
 # ----------------- Morpion (absolu) -----------------
 def check_winner_abs(board_abs: List[int]) -> int:
     wins = [
@@ -38,6 +55,22 @@ def abs_to_state(board_abs: List[int], current_player_abs: int) -> State:
     factor = 1 if current_player_abs == 1 else -1
     return tuple(v * factor for v in board_abs)
 
+# ----------------- Encodage compact (base 3) -----------------
+# code = sum((v + 1) * 3**i) : 9 cases -> entier < 3**9 = 19683 (tient sur 16 bits)
+
+def encode_state(state: State) -> int:
+    code = 0
+    for v in reversed(state):
+        code = code * 3 + (v + 1)
+    return code
+
+def decode_state(code: int) -> State:
+    out = []
+    for _ in range(9):
+        code, d = divmod(code, 3)
+        out.append(d - 1)
+    return tuple(out)
+
 # ----------------- Symétries (canonicalisation + mapping actions) -----------------
 # transform t : state_t[j] = state[t[j]]
 # action original -> transformé : a' = inv[t][a] (où t[a'] == a)
@@ -80,6 +113,104 @@ def action_to_canonical(action: int, transform_id: int) -> int:
 def action_from_canonical(action_c: int, transform_id: int) -> int:
     return _TRANSFORMS[transform_id][action_c]
 
+# ----------------- Convergence / arrêt anticipé -----------------
+@dataclass
+class ConvergenceCriteria:
+    """
+    Seuils d'arrêt anticipé, évalués sur une fenêtre glissante de `window` épisodes.
+    Un seuil à None est ignoré ; l'arrêt a lieu quand TOUS les seuils fournis sont atteints.
+      - max_q_delta       : plus grand |ΔQ| observé sur la fenêtre
+      - max_policy_change : part des updates ayant changé l'action greedy de l'état
+      - min_draw_rate     : taux de nuls glissant
+    """
+    window: int = 200
+    max_q_delta: Optional[float] = None
+    max_policy_change: Optional[float] = None
+    min_draw_rate: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConvergenceCriteria":
+        def opt(key: str) -> Optional[float]:
+            v = data.get(key)
+            return None if v is None else float(v)
+
+        return cls(
+            window=max(1, int(data.get("window", 200))),
+            max_q_delta=opt("max_q_delta"),
+            max_policy_change=opt("max_policy_change"),
+            min_draw_rate=opt("min_draw_rate"),
+        )
+
+    def enabled(self) -> bool:
+        return any(v is not None for v in (self.max_q_delta, self.max_policy_change, self.min_draw_rate))
+
+
+class ConvergenceMonitor:
+    """
+    Collecte, épisode par épisode, les compteurs de l'agent (|ΔQ| max, changements
+    de politique greedy, nombre d'updates) et le résultat, puis teste les critères.
+    """
+
+    def __init__(self, criteria: ConvergenceCriteria, agent: "QLearningAgent"):
+        self.criteria = criteria
+        agent._ep_q_delta = 0.0
+        agent._ep_policy_changes = 0
+        agent._ep_updates = 0
+        # _apply ne compte les changements de politique greedy que sous monitor
+        agent._track_policy = True
+        self._hist: Deque[Tuple[float, int, int, bool]] = deque(maxlen=criteria.window)
+        self.q_delta = 0.0
+        self.policy_change = 0.0
+        self.draw_rate = 0.0
+
+    def end_episode(self, agent: "QLearningAgent", draw: bool) -> str:
+        """
+        Enregistre l'épisode écoulé ; renvoie la raison d'arrêt ("" si on continue).
+        """
+        self._hist.append((agent._ep_q_delta, agent._ep_policy_changes, agent._ep_updates, draw))
+        agent._ep_q_delta = 0.0
+        agent._ep_policy_changes = 0
+        agent._ep_updates = 0
+
+        c = self.criteria
+        if len(self._hist) < c.window or not c.enabled():
+            return ""
+
+        updates = sum(h[2] for h in self._hist)
+        self.q_delta = max(h[0] for h in self._hist)
+        self.policy_change = sum(h[1] for h in self._hist) / max(1, updates)
+        self.draw_rate = sum(1 for h in self._hist if h[3]) / len(self._hist)
+
+        reasons = []
+        if c.max_q_delta is not None:
+            if self.q_delta > c.max_q_delta:
+                return ""
+            reasons.append(f"max|dQ|={self.q_delta:.2e}<={c.max_q_delta:g}")
+        if c.max_policy_change is not None:
+            if self.policy_change > c.max_policy_change:
+                return ""
+            reasons.append(f"policy_change={self.policy_change:.4f}<={c.max_policy_change:g}")
+        if c.min_draw_rate is not None:
+            if self.draw_rate < c.min_draw_rate:
+                return ""
+            reasons.append(f"draw_rate={self.draw_rate:.3f}>={c.min_draw_rate:g}")
+        return ", ".join(reasons)
+
+    def detach(self, agent: "QLearningAgent") -> None:
+        agent._track_policy = False
+
+    def report(self, episodes_requested: int, episodes_run: int, reason: str) -> Dict[str, Any]:
+        return {
+            "episodes_requested": float(episodes_requested),
+            "stopped_early": bool(reason),
+            "stop_reason": reason,
+            "stopped_at": float(episodes_run),
+            "window_q_delta_max": float(self.q_delta),
+            "window_policy_change_rate": float(self.policy_change),
+            "window_draw_rate": float(self.draw_rate),
+        }
+
+
 # ----------------- Agent Q-learning (zéro-somme) -----------------
 @dataclass
 class QLearningAgent:
@@ -90,30 +221,193 @@ class QLearningAgent:
     epsilon_min: float = 0.02
     epsilon_decay: float = 0.9995
 
+    # "td0" : backup à un pas, en ligne (historique)
+    # "td_lambda" / "mc" : retours lambda / Monte Carlo, appliqués en une passe en fin d'épisode
+    learning_mode: str = "td0"
+    lam: float = 0.8
+
+    # pas adaptatif : alpha_eff = max(alpha, 1 / n(s, a))
+    adaptive_alpha: bool = False
+
     qtable_path: str = "qtable.pkl"
+    # "pickle" : dict brut (historique) ; "float32" | "float16" | "int8" : format compact (qcompact.py)
+    storage: str = "pickle"
     q: QTable = None
+    visits: Dict[State, List[int]] = None
+
+    # agrégateur multi-nœuds (qsync_server.py), ex. "http://127.0.0.1:9200" ; vide = pas de synchro
+    sync_url: str = ""
 
     def __post_init__(self):
+        from qcompact import DTYPES
+
+        if self.storage != "pickle" and self.storage not in DTYPES:
+            raise ValueError(f"storage inconnu: {self.storage!r} (pickle, {', '.join(DTYPES)})")
         if self.q is None:
             self.q = {}
+        if self.visits is None:
+            self.visits = {}
+        # compteurs de l'épisode en cours (lus / remis à zéro par ConvergenceMonitor)
+        self._ep_q_delta = 0.0
+        self._ep_policy_changes = 0
+        self._ep_updates = 0
+        self._track_policy = False
+        # synchro : version du serveur et valeurs / visites au dernier échange
+        self.sync_version = 0
+        self.sync_epoch = ""
+        self._sync_base: QTable = {}
+        self._sync_base_visits: Dict[State, List[int]] = {}
+        # protège q / visits entre les threads de requêtes (_apply) et la synchro / sauvegarde
+        self._lock = threading.RLock()
         self.load()
 
     def load(self) -> None:
+        from qcompact import expand, is_compact
+
         try:
             with open(self.qtable_path, "rb") as f:
-                self.q = pickle.load(f)
+                data = pickle.load(f)
+            self.q = expand(data) if is_compact(data) else data
         except FileNotFoundError:
             self.q = {}
         except Exception:
             self.q = {}
+        self._seed_visits()
+
+    def _seed_visits(self) -> None:
+        """
+        Les visites ne sont pas sauvegardées avec la table : chaque valeur déjà apprise
+        compte pour ceil(1 / alpha) visites, pour qu'adaptive_alpha reparte au pas de base
+        au lieu de remplacer Q par une seule cible (pas 1, 1/2, ...).
+        """
+        seed = math.ceil(1.0 / self.alpha) if self.alpha > 0 else 1
+        for s_c, row in self.q.items():
+            if s_c not in self.visits and any(row):
+                self.visits[s_c] = [seed if v != 0.0 else 0 for v in row]
 
     def save(self) -> None:
+        if self.storage != "pickle":
+            from qcompact import compact
+
+            with self._lock:
+                data = pickle.dumps(compact(self.q, self.storage), protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            with self._lock:
+                data = pickle.dumps(self.q)
         with open(self.qtable_path, "wb") as f:
-            pickle.dump(self.q, f)
+            f.write(data)
+
+    # ---------- synchro multi-nœuds ----------
+    def sync_deltas(self) -> List[List[float]]:
+        """
+        Deltas locaux depuis le dernier échange :
+        [[code état, action, delta Q, delta visites, Q local, visites de base], ...]
+        (Q local / visites de base : fusion pondérée par les visites côté agrégateur)
+        """
+        with self._lock:
+            return self._deltas(self.q, self.visits)
+
+    def _deltas(self, q: QTable, visits: Dict[State, List[int]]) -> List[List[float]]:
+        out: List[List[float]] = []
+        zeros_f = [0.0] * 9
+        zeros_i = [0] * 9
+        for s_c, row in q.items():
+            base = self._sync_base.get(s_c, zeros_f)
+            n = visits.get(s_c, zeros_i)
+            n_base = self._sync_base_visits.get(s_c, zeros_i)
+            code = None
+            for a in range(9):
+                dq = row[a] - base[a]
+                dn = n[a] - n_base[a]
+                if dq != 0.0 or dn != 0:
+                    if code is None:
+                        code = encode_state(s_c)
+                    out.append([code, a, dq, dn, row[a], n_base[a]])
+        return out
+
+    def sync(self, url: Optional[str] = None, timeout: float = 10.0) -> Dict[str, Any]:
+        """
+        Pousse les deltas locaux vers l'agrégateur puis récupère les lignes fusionnées
+        modifiées depuis `sync_version`. Les updates faits pendant l'échange sont conservés
+        (ré-appliqués par-dessus la ligne fusionnée, et poussés au prochain sync).
+
+        Premier échange (ou agrégateur redémarré, epoch différente) : la table locale sert
+        de graine si l'agrégateur est vide. Sinon les lignes connues de l'agrégateur sont
+        remplacées par la version fusionnée (jamais poussées comme delta : N nœuds partis
+        du même qtable.pkl ne les compteraient pas N fois), et les lignes absentes de
+        l'agrégateur sont poussées en entier à l'échange suivant (base à zéro).
+        """
+        import requests
+
+        base_url = (url or self.sync_url).rstrip("/")
+        if not base_url:
+            raise ValueError("sync_url vide")
+
+        with self._lock:
+            snapshot = {s_c: row[:] for s_c, row in self.q.items()}
+            snapshot_visits = {s_c: n[:] for s_c, n in self.visits.items()}
+        zeros_f = [0.0] * 9
+        zeros_i = [0] * 9
+
+        pushed = 0
+        seed_refused = False
+        if self.sync_version == 0:
+            rows = [[encode_state(s_c), row, snapshot_visits.get(s_c, zeros_i)] for s_c, row in snapshot.items()]
+            resp = requests.post(f"{base_url}/seed", json={"rows": rows}, timeout=timeout)
+            resp.raise_for_status()
+            seed_refused = bool(rows) and not resp.json().get("seeded", False)
+        else:
+            deltas = self._deltas(snapshot, snapshot_visits)
+            pushed = len(deltas)
+            if deltas:
+                resp = requests.post(
+                    f"{base_url}/push", json={"epoch": self.sync_epoch, "deltas": deltas}, timeout=timeout
+                )
+                if resp.status_code == 409:
+                    # agrégateur redémarré entre deux échanges
+                    self.sync_version = 0
+                    return self.sync(url, timeout)
+                resp.raise_for_status()
+
+        resp = requests.get(f"{base_url}/pull", params={"since": self.sync_version}, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+
+        if self.sync_version and data.get("epoch") != self.sync_epoch:
+            # agrégateur redémarré : deltas perdus côté serveur, on repart d'une graine
+            self.sync_version = 0
+            return self.sync(url, timeout)
+
+        with self._lock:
+            if seed_refused:
+                # agrégateur déjà peuplé : seules les lignes renvoyées par /pull sont dans
+                # la base, les lignes locales absentes du serveur partent comme deltas
+                self._sync_base = {}
+                self._sync_base_visits = {}
+            else:
+                # ce qui a été poussé (ou semé) fait désormais partie de la base
+                self._sync_base = snapshot
+                self._sync_base_visits = snapshot_visits
+
+            for code, values, counts in data.get("rows", []):
+                s_c = decode_state(int(code))
+                sent = snapshot.get(s_c, zeros_f)
+                sent_n = snapshot_visits.get(s_c, zeros_i)
+                row = self.q.get(s_c, zeros_f)
+                n = self.visits.get(s_c, zeros_i)
+                self.q[s_c] = [values[a] + (row[a] - sent[a]) for a in range(9)]
+                self.visits[s_c] = [counts[a] + (n[a] - sent_n[a]) for a in range(9)]
+                self._sync_base[s_c] = [float(v) for v in values]
+                self._sync_base_visits[s_c] = [int(c) for c in counts]
+
+        self.sync_epoch = data.get("epoch", "")
+        self.sync_version = int(data.get("version", self.sync_version))
+        return {"pushed": pushed, "pulled": len(data.get("rows", [])), "version": self.sync_version}
 
     def _ensure_state(self, s_canon: State) -> None:
         if s_canon not in self.q:
-            self.q[s_canon] = [0.0] * 9
+            with self._lock:
+                self.q.setdefault(s_canon, [0.0] * 9)
 
     def choose_action(self, s: State, epsilon_override: Optional[float] = None) -> int:
         """
@@ -138,29 +432,128 @@ class QLearningAgent:
         best_ac = max(actions_c, key=lambda ac: qvals[ac])
         return action_from_canonical(best_ac, k)
 
-    def update(self, s: State, a: int, r: float, s_next: Optional[State], terminal: bool) -> None:
+    @property
+    def episodic(self) -> bool:
+        """True si les backups sont faits en fin d'épisode (td_lambda / mc)."""
+        return self.learning_mode in ("td_lambda", "mc")
+
+    def _max_q(self, s: State) -> float:
+        acts = available_actions_state(s)
+        if not acts:
+            return 0.0
+        s_c, k = canonicalize(s)
+        self._ensure_state(s_c)
+        q_s = self.q[s_c]
+        return max(q_s[action_to_canonical(x, k)] for x in acts)
+
+    def _apply(self, s: State, a: int, target: float) -> float:
+        """
+        Q(s, a) <- Q(s, a) + alpha_eff * (target - Q(s, a)), et compte la visite.
+        Renvoie l'erreur TD (target - Q(s, a) avant update).
+        """
+        s_c, k = canonicalize(s)
+        a_c = action_to_canonical(a, k)
+        with self._lock:
+            self._ensure_state(s_c)
+            q_s = self.q[s_c]
+
+            n_s = self.visits.get(s_c)
+            if n_s is None:
+                n_s = self.visits[s_c] = [0] * 9
+            n_s[a_c] += 1
+
+            step = self.alpha
+            if self.adaptive_alpha:
+                step = max(self.alpha, 1.0 / n_s[a_c])
+
+            track = self._track_policy
+            if track:
+                legal_c = available_actions_state(s_c)
+                greedy_before = max(legal_c, key=q_s.__getitem__)
+
+            td_error = target - q_s[a_c]
+            dq = step * td_error
+            q_s[a_c] = q_s[a_c] + dq
+            if track and max(legal_c, key=q_s.__getitem__) != greedy_before:
+                self._ep_policy_changes += 1
+        if abs(dq) > self._ep_q_delta:
+            self._ep_q_delta = abs(dq)
+        self._ep_updates += 1
+        return td_error
+
+    def update(self, s: State, a: int, r: float, s_next: Optional[State], terminal: bool) -> float:
         """
         Update zéro-somme :
         s_next est l'état du JOUEUR SUIVANT (adversaire). Donc la valeur pour moi est l'opposé :
           target = r - gamma * max Q(s_next, a_next)
+        Renvoie l'erreur TD (utilisée comme priorité par le replay).
         """
-        s_c, k = canonicalize(s)
-        a_c = action_to_canonical(a, k)
-        self._ensure_state(s_c)
-        q_s = self.q[s_c]
-
         target = r
         if not terminal and s_next is not None:
-            s2_c, k2 = canonicalize(s_next)
-            self._ensure_state(s2_c)
-            q_s2 = self.q[s2_c]
+            target -= self.gamma * self._max_q(s_next)
 
-            acts2 = available_actions_state(s_next)
-            if acts2:
-                acts2_c = [action_to_canonical(x, k2) for x in acts2]
-                target -= self.gamma * max(q_s2[ac] for ac in acts2_c)
+        return self._apply(s, a, target)
 
-        q_s[a_c] = q_s[a_c] + self.alpha * (target - q_s[a_c])
+    def replay_updates(self, buffer: "ReplayBuffer", n_updates: int) -> int:
+        """
+        Rejoue `n_updates` transitions du buffer, par mini-batchs de buffer.batch_size.
+        Les priorités sont rafraîchies avec |erreur TD|. Renvoie le nombre d'updates faits.
+        """
+        done = 0
+        while done < n_updates and len(buffer) > 0:
+            k = min(buffer.batch_size, n_updates - done)
+            idxs, batch = buffer.sample(k)
+            errors = [self.update(s, a, r, s_next, terminal) for s, a, r, s_next, terminal in batch]
+            buffer.update_priorities(idxs, errors)
+            done += k
+        return done
+
+    def _replay_after_episode(self, buffer: Optional["ReplayBuffer"], transitions: List[Transition]) -> None:
+        if buffer is None:
+            return
+        for t in transitions:
+            buffer.push(*t)
+        n = buffer.replay_count(len(transitions))
+        if n:
+            self.replay_updates(buffer, n)
+
+    def learn_episode(self, steps: List[Step]) -> None:
+        """
+        Backup de fin d'épisode, en une passe arrière sur la trajectoire :
+          G_T = r_T                                                  (terminal)
+          G_t = r_t + sign * gamma * ((1 - lam) * max Q(s_next) + lam * G_{t+1})
+        lam = 1 en mode "mc" (retour Monte Carlo), self.lam en mode "td_lambda",
+        0 sinon (équivaut à td0 rejoué à l'envers).
+        """
+        if self.learning_mode == "mc":
+            lam = 1.0
+        elif self.learning_mode == "td_lambda":
+            lam = self.lam
+        else:
+            lam = 0.0
+
+        g = 0.0
+        for s, a, r, s_next, sign in reversed(steps):
+            if s_next is None:
+                g = r
+            else:
+                boot = self._max_q(s_next)
+                g = r + sign * self.gamma * ((1.0 - lam) * boot + lam * g)
+            self._apply(s, a, g)
+
+    @staticmethod
+    def agent_steps(moves: List[Tuple[State, int]], final_r: float) -> List[Step]:
+        """
+        Trajectoire d'un seul joueur (contre un adversaire externe) :
+        chaque coup mène au prochain état de ce même joueur.
+        """
+        steps: List[Step] = []
+        for i, (s, a) in enumerate(moves):
+            if i + 1 < len(moves):
+                steps.append((s, a, 0.0, moves[i + 1][0], 1))
+            else:
+                steps.append((s, a, final_r, None, 1))
+        return steps
 
     def decay_epsilon(self) -> None:
         if self.epsilon > self.epsilon_min:
@@ -168,10 +561,21 @@ class QLearningAgent:
             if self.epsilon < self.epsilon_min:
                 self.epsilon = self.epsilon_min
 
-    def self_play(self, episodes: int = 500) -> Dict[str, float]:
+    def self_play(
+        self,
+        episodes: int = 500,
+        convergence: Optional[ConvergenceCriteria] = None,
+        replay: Optional["ReplayBuffer"] = None,
+    ) -> Dict[str, Any]:
         """
         Self-play équilibré : on alterne qui commence (X puis O).
+        Si `convergence` est fourni, l'entraînement s'arrête dès que ses critères sont atteints.
+        Si `replay` est fourni, les transitions y sont stockées puis rejouées (replay_ratio).
         """
+        monitor = ConvergenceMonitor(convergence, self) if convergence is not None else None
+        stop_reason = ""
+        episodes_run = 0
+
         x_wins = 0
         o_wins = 0
         draws = 0
@@ -181,6 +585,8 @@ class QLearningAgent:
             board_abs = [0] * 9
             current = 1 if (ep % 2 == 0) else -1  # alternance
 
+            steps: List[Step] = []
+
             moves = 0
             while True:
                 s = abs_to_state(board_abs, current)
@@ -195,7 +601,9 @@ class QLearningAgent:
 
                 winner = check_winner_abs(board_abs)
                 if winner != 0:
-                    self.update(s, a, r=1.0, s_next=None, terminal=True)
+                    steps.append((s, a, 1.0, None, -1))
+                    if not self.episodic:
+                        self.update(s, a, r=1.0, s_next=None, terminal=True)
                     if winner == 1:
                         x_wins += 1
                     else:
@@ -203,21 +611,37 @@ class QLearningAgent:
                     break
 
                 if is_full_abs(board_abs):
-                    self.update(s, a, r=0.0, s_next=None, terminal=True)
+                    steps.append((s, a, 0.0, None, -1))
+                    if not self.episodic:
+                        self.update(s, a, r=0.0, s_next=None, terminal=True)
                     draws += 1
                     break
 
                 next_player = -current
                 s_next = abs_to_state(board_abs, next_player)
-                self.update(s, a, r=0.0, s_next=s_next, terminal=False)
+                steps.append((s, a, 0.0, s_next, -1))
+                if not self.episodic:
+                    self.update(s, a, r=0.0, s_next=s_next, terminal=False)
                 current = next_player
 
+            if self.episodic:
+                self.learn_episode(steps)
+            self._replay_after_episode(
+                replay, [(st[0], st[1], st[2], st[3], st[3] is None) for st in steps]
+            )
+
             total_moves += moves
             self.decay_epsilon()
+            episodes_run += 1
 
-        total = max(1, episodes)
-        return {
-            "episodes": float(episodes),
+            if monitor is not None:
+                stop_reason = monitor.end_episode(self, draw=check_winner_abs(board_abs) == 0)
+                if stop_reason:
+                    break
+
+        total = max(1, episodes_run)
+        stats: Dict[str, Any] = {
+            "episodes": float(episodes_run),
             "x_win_rate": x_wins / total,
             "o_win_rate": o_wins / total,
             "draw_rate": draws / total,
@@ -225,16 +649,30 @@ class QLearningAgent:
             "epsilon": float(self.epsilon),
             "qtable_states": float(len(self.q)),
         }
-
-    def train_vs_minimax(self, episodes: int = 500) -> Dict[str, float]:
+        if monitor is not None:
+            stats.update(monitor.report(episodes, episodes_run, stop_reason))
+            monitor.detach(self)
+        return stats
+
+    def train_vs_minimax(
+        self,
+        episodes: int = 500,
+        convergence: Optional[ConvergenceCriteria] = None,
+        replay: Optional["ReplayBuffer"] = None,
+    ) -> Dict[str, Any]:
         """
         Entraîne l'agent contre Minimax (optimal).
         - On alterne le joueur qui commence (X/O)
         - On alterne le symbole contrôlé par l'agent (agent en X puis agent en O)
         - On met à jour Q uniquement sur les coups de l'agent
+        - Arrêt anticipé possible via `convergence`, experience replay via `replay`
         """
         from minimax import minimax_best_move
 
+        monitor = ConvergenceMonitor(convergence, self) if convergence is not None else None
+        stop_reason = ""
+        episodes_run = 0
+
         agent_wins = 0
         agent_losses = 0
         draws = 0
@@ -251,15 +689,20 @@ class QLearningAgent:
 
             last_agent_s: Optional[State] = None
             last_agent_a: Optional[int] = None
+            agent_moves: List[Tuple[State, int]] = []
+            transitions: List[Transition] = []
+            final_r = 0.0
 
             moves = 0
             while True:
                 winner = check_winner_abs(board_abs)
                 if winner != 0:
                     # si minimax vient de gagner, il faut punir le dernier coup agent
+                    final_r = 1.0 if winner == agent_mark else -1.0
                     if last_agent_s is not None and last_agent_a is not None:
-                        r = 1.0 if winner == agent_mark else -1.0
-                        self.update(last_agent_s, last_agent_a, r=r, s_next=None, terminal=True)
+                        transitions.append((last_agent_s, last_agent_a, final_r, None, True))
+                        if not self.episodic:
+                            self.update(last_agent_s, last_agent_a, r=final_r, s_next=None, terminal=True)
                     if winner == agent_mark:
                         agent_wins += 1
                     else:
@@ -267,8 +710,11 @@ class QLearningAgent:
                     break
 
                 if is_full_abs(board_abs):
+                    final_r = 0.0
                     if last_agent_s is not None and last_agent_a is not None:
-                        self.update(last_agent_s, last_agent_a, r=0.0, s_next=None, terminal=True)
+                        transitions.append((last_agent_s, last_agent_a, 0.0, None, True))
+                        if not self.episodic:
+                            self.update(last_agent_s, last_agent_a, r=0.0, s_next=None, terminal=True)
                     draws += 1
                     break
 
@@ -278,21 +724,30 @@ class QLearningAgent:
                     a = self.choose_action(s)  # exploration via epsilon
                     board_abs[a] = current
                     moves += 1
+                    agent_moves.append((s, a))
 
                     winner2 = check_winner_abs(board_abs)
                     if winner2 != 0:
-                        self.update(s, a, r=1.0, s_next=None, terminal=True)
+                        final_r = 1.0
+                        transitions.append((s, a, 1.0, None, True))
+                        if not self.episodic:
+                            self.update(s, a, r=1.0, s_next=None, terminal=True)
                         agent_wins += 1
                         break
 
                     if is_full_abs(board_abs):
-                        self.update(s, a, r=0.0, s_next=None, terminal=True)
+                        final_r = 0.0
+                        transitions.append((s, a, 0.0, None, True))
+                        if not self.episodic:
+                            self.update(s, a, r=0.0, s_next=None, terminal=True)
                         draws += 1
                         break
 
                     # non terminal -> tour minimax
                     s_next = abs_to_state(board_abs, -current)
-                    self.update(s, a, r=0.0, s_next=s_next, terminal=False)
+                    transitions.append((s, a, 0.0, s_next, False))
+                    if not self.episodic:
+                        self.update(s, a, r=0.0, s_next=s_next, terminal=False)
 
                     last_agent_s, last_agent_a = s, a
                     current = -current
@@ -303,12 +758,22 @@ class QLearningAgent:
                     moves += 1
                     current = -current
 
+            if self.episodic and agent_moves:
+                self.learn_episode(self.agent_steps(agent_moves, final_r))
+            self._replay_after_episode(replay, transitions)
+
             total_moves += moves
             self.decay_epsilon()
+            episodes_run += 1
 
-        total = max(1, episodes)
-        return {
-            "episodes": float(episodes),
+            if monitor is not None:
+                stop_reason = monitor.end_episode(self, draw=check_winner_abs(board_abs) == 0)
+                if stop_reason:
+                    break
+
+        total = max(1, episodes_run)
+        stats: Dict[str, Any] = {
+            "episodes": float(episodes_run),
             "agent_win_rate": agent_wins / total,
             "agent_loss_rate": agent_losses / total,
             "draw_rate": draws / total,
@@ -316,3 +781,7 @@ class QLearningAgent:
             "epsilon": float(self.epsilon),
             "qtable_states": float(len(self.q)),
         }
+        if monitor is not None:
+            stats.update(monitor.report(episodes, episodes_run, stop_reason))
+            monitor.detach(self)
+        return stats
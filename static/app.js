@@ -47,7 +47,7 @@ function renderLastTrain(mode, s) {
   }
 }
 
-function renderArena(r) {
+function renderArena(r, progress=null) {
   if (!r) return;
   document.getElementById("aX").textContent = r.x_wins ?? "-";
   document.getElementById("aO").textContent = r.o_wins ?? "-";
@@ -58,6 +58,9 @@ function renderArena(r) {
   const hint = document.getElementById("arenaHint");
   if (r.errors > 0) {
     hint.textContent = `Dernière erreur: ${r.last_error || "(non précisée)"}`;
+  } else if (progress) {
+    hint.textContent = `Matchs: ${progress.played}/${r.games} | X=${r.x} vs O=${r.o} | ` +
+      `X ${pct(progress.x_win_rate)} · O ${pct(progress.o_win_rate)} · nuls ${pct(progress.draw_rate)}`;
   } else {
     hint.textContent = `Matchs: ${r.games} | X=${r.x} vs O=${r.o}`;
   }
@@ -67,6 +70,9 @@ function render() {
   if (!state) return;
 
   botNameEl.textContent = state.bot_name ?? "?";
+  if (state.bot_info) {
+    botNameEl.textContent += ` (${state.bot_info.playouts} playouts, ${Math.round(state.bot_info.playouts_per_s)}/s)`;
+  }
   humanMarkEl.textContent = state.human ?? "?";
   botMarkEl.textContent = state.bot ?? "?";
   turnEl.textContent = state.turn ?? "?";
@@ -205,6 +211,9 @@ async function train() {
   await refreshEpsilonUI();
 }
 
+let arenaAbort = null;
+let arenaRunId = null;
+
 async function runArena() {
   const x = document.getElementById("arenaX").value;
   const o = document.getElementById("arenaO").value;
@@ -215,23 +224,81 @@ async function runArena() {
     setMsg("Arena: Remote sélectionné mais l’URL est vide.", "bad");
     return;
   }
+  if (arenaAbort) return;
 
   setMsg(`Arena en cours: X=${x} vs O=${o} (${games} parties)…`, "");
 
-  const res = await fetch(`${API_BASE}/api/arena`, {
-    method: "POST",
-    headers: {"Content-Type":"application/json"},
-    body: JSON.stringify({ x, o, games, remote_url: remoteUrl })
-  });
-  const data = await res.json();
+  arenaAbort = new AbortController();
+  arenaRunId = (crypto.randomUUID ? crypto.randomUUID() : String(Date.now()));
+  const batch = Math.max(1, Math.min(50, Math.round(games / 20)));
+
+  let last = null;
+  try {
+    const res = await fetch(`${API_BASE}/api/arena`, {
+      method: "POST",
+      headers: {"Content-Type":"application/json"},
+      body: JSON.stringify({ x, o, games, remote_url: remoteUrl, stream: true, batch, run_id: arenaRunId }),
+      signal: arenaAbort.signal
+    });
+
+    if (!res.ok) {
+      const data = await res.json();
+      setMsg(data.error || "Erreur arena.", "bad");
+      return;
+    }
 
-  if (!res.ok || !data.ok) {
-    setMsg(data.error || "Erreur arena.", "bad");
+    // NDJSON : une ligne JSON par lot de parties
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buf += decoder.decode(value, { stream: true });
+      let nl;
+      while ((nl = buf.indexOf("\n")) >= 0) {
+        const lineText = buf.slice(0, nl).trim();
+        buf = buf.slice(nl + 1);
+        if (!lineText) continue;
+        const msg = JSON.parse(lineText);
+        if (msg.type === "start") continue;
+        last = msg;
+        renderArena(msg.result, msg);
+        if (msg.type === "progress") {
+          setMsg(`Arena: ${msg.played}/${games} parties (${msg.games_per_s.toFixed(1)}/s)…`, "");
+        }
+      }
+    }
+  } catch (e) {
+    if (e.name !== "AbortError") {
+      setMsg("Erreur arena.", "bad");
+      return;
+    }
+  } finally {
+    arenaAbort = null;
+    arenaRunId = null;
+  }
+
+  if (!last) {
+    setMsg("Arena interrompue.", "bad");
     return;
   }
+  const r = last.result;
+  const why = last.type === "done" && last.stop_reason !== "complete" ? ` | arrêt: ${last.stop_reason}` : "";
+  setMsg(`Arena OK (${last.played} parties): Xwins=${r.x_wins}, Owins=${r.o_wins}, nuls=${r.draws}${why}`, "good");
+}
 
-  renderArena(data.result);
-  setMsg(`Arena OK: Xwins=${data.result.x_wins}, Owins=${data.result.o_wins}, nuls=${data.result.draws}`, "good");
+async function stopArena() {
+  if (!arenaAbort) return;
+  const runId = arenaRunId;
+  arenaAbort.abort();
+  if (runId) {
+    await fetch(`${API_BASE}/api/arena/cancel`, {
+      method: "POST",
+      headers: {"Content-Type":"application/json"},
+      body: JSON.stringify({ run_id: runId })
+    }).catch(() => {});
+  }
 }
 
 document.getElementById("playX").addEventListener("click", () => newGame("X"));
@@ -239,5 +306,6 @@ document.getElementById("playO").addEventListener("click", () => newGame("O"));
 document.getElementById("trainBtn").addEventListener("click", train);
 document.getElementById("setEpsBtn").addEventListener("click", applyEpsilon);
 document.getElementById("arenaBtn").addEventListener("click", runArena);
+document.getElementById("arenaStopBtn").addEventListener("click", stopArena);
 
 refreshEpsilonUI().then(() => newGame("X"));
@@ -0,0 +1,313 @@
+# tournament.py
+"""
+Tournoi round-robin entre bots : chaque paire joue dans les deux couleurs, les parties
+sont réparties sur un pool de workers (process ou threads), et on renvoie les matrices
+victoires / nuls / défaites ainsi qu'un classement Elo avec intervalles de confiance.
+
+Participants (chaîne ou dict) :
+  "rl"                      Q-table par défaut (qtable.pkl)
+  "rl:snap.pkl"             snapshot RL chargé depuis un autre fichier
+  "minimax"
+  "alphabeta"               moteur alpha-beta de ngame.py
+  "mcts"                    MCTS (mcts.py), budget par défaut
+  "remote:http://host:9100" bot distant (même protocole que rl_remote_api.py)
+  {"name": "..", "kind": "rl|minimax|remote|alphabeta|mcts", "qtable": "..", "url": ".."}
+
+Usage CLI :
+  python tournament.py rl minimax rl:old.pkl remote:http://127.0.0.1:9100 --games 20 --workers 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import pickle
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from rl import QLearningAgent, check_winner_abs, is_full_abs
+from players import BOT_KINDS, choose_move
+
+DEFAULT_QTABLE = "qtable.pkl"
+
+def parse_participant(
+    p: Any,
+    default_qtable: str = DEFAULT_QTABLE,
+    snapshot_dir: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    snapshot_dir : si fourni (appels HTTP), un "rl:<nom>" désigne un fichier de ce
+    dossier par son nom seul ; sinon le chemin est pris tel quel (CLI).
+    """
+    if isinstance(p, str):
+        kind, _, arg = p.partition(":")
+        p = {"kind": kind}
+        if kind == "rl" and arg:
+            p["qtable"] = arg
+        elif kind == "remote":
+            p["url"] = arg
+    if not isinstance(p, dict):
+        raise ValueError("participant invalide")
+
+    kind = (p.get("kind") or "").lower()
+    if kind not in BOT_KINDS:
+        raise ValueError(f"type de participant inconnu: {kind!r}")
+
+    spec = {"kind": kind, "qtable": "", "url": ""}
+    label = ""
+    if kind == "rl":
+        label = p.get("qtable") or default_qtable
+        spec["qtable"] = _resolve_qtable(p.get("qtable") or "", default_qtable, snapshot_dir)
+    if kind == "remote":
+        spec["url"] = (p.get("url") or "").strip().rstrip("/")
+        if not spec["url"]:
+            raise ValueError("participant remote sans url")
+
+    default_name = {"rl": f"rl:{label}", "remote": f"remote:{spec['url']}"}.get(kind, kind)
+    spec["name"] = p.get("name") or default_name
+    return spec
+
+
+def _resolve_qtable(name: str, default_qtable: str, snapshot_dir: Optional[str]) -> str:
+    """Chemin de la Q-table d'un participant rl, vérifiée (ValueError si absente ou illisible)."""
+    if not name:
+        path = default_qtable
+    elif snapshot_dir is None:
+        path = name
+    else:
+        if os.path.basename(name) != name or name in (".", ".."):
+            raise ValueError(f"snapshot invalide: {name!r} (nom de fichier seul attendu)")
+        path = os.path.join(snapshot_dir, name)
+
+    if path == default_qtable and not os.path.exists(path):
+        return path  # table par défaut pas encore sauvegardée : vide, comme l'agent de l'app
+    if not os.path.isfile(path):
+        raise ValueError(f"snapshot introuvable: {name or path!r}")
+    try:
+        from qcompact import is_compact
+
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        raise ValueError(f"snapshot illisible: {name or path!r}")
+    if not (isinstance(data, dict) and (is_compact(data) or all(isinstance(k, tuple) for k in data))):
+        raise ValueError(f"snapshot illisible: {name or path!r}")
+    return path
+
+
+def _agent_for(q: Dict[Any, List[float]]) -> QLearningAgent:
+    ag = QLearningAgent(qtable_path=os.devnull)
+    ag.q = q
+    ag.epsilon = 0.0
+    return ag
+
+
+def play_games(
+    x: Dict[str, str], o: Dict[str, str], games: int, tables: Dict[str, Dict[Any, List[float]]]
+) -> Dict[str, Any]:
+    """
+    Joue `games` parties x (X) contre o (O). Exécuté dans un worker.
+    `tables` : Q-tables lues par run_tournament, par chemin (pas de cache dans le worker :
+    un process réutilisé ne doit pas garder une table périmée).
+    """
+    import requests
+
+    session = requests.Session()
+    players = {}
+    for mark, spec in ((1, x), (-1, o)):
+        players[mark] = (spec["kind"], _agent_for(tables[spec["qtable"]]) if spec["kind"] == "rl" else None, spec["url"])
+
+    out = {"x_wins": 0, "o_wins": 0, "draws": 0, "errors": 0, "last_error": "", "moves": 0}
+    for _ in range(games):
+        board_abs = [0] * 9
+        turn = 1
+        while True:
+            winner = check_winner_abs(board_abs)
+            if winner != 0:
+                out["x_wins" if winner == 1 else "o_wins"] += 1
+                break
+            if is_full_abs(board_abs):
+                out["draws"] += 1
+                break
+
+            kind, agent, url = players[turn]
+            idx, err = choose_move(board_abs, turn, kind, agent=agent, remote_url=url, session=session)
+            if err:
+                # comme l'arena : erreur comptée comme nul
+                out["errors"] += 1
+                out["last_error"] = err
+                out["draws"] += 1
+                break
+
+            board_abs[idx] = turn
+            out["moves"] += 1
+            turn *= -1
+    return out
+
+
+def elo_ratings(
+    n: int,
+    games: List[List[int]],
+    scores: List[List[float]],
+    iters: int = 200,
+) -> List[Tuple[float, float]]:
+    """
+    Elo par maximum de vraisemblance (nul = 0.5). games[i][j] = parties i contre j,
+    scores[i][j] = points de i contre j. Chaque joueur reçoit un nul virtuel contre un
+    joueur fixe à 1500 (évite la divergence à 100 % / 0 %). Renvoie [(rating, ic95)].
+    """
+    c = math.log(10) / 400.0
+    r = [1500.0] * n
+
+    def expected(ri: float, rj: float) -> float:
+        return 1.0 / (1.0 + 10 ** ((rj - ri) / 400.0))
+
+    info = [0.0] * n
+    for _ in range(iters):
+        moved = 0.0
+        for i in range(n):
+            e0 = expected(r[i], 1500.0)
+            grad = 0.5 - e0
+            info[i] = e0 * (1.0 - e0)
+            for j in range(n):
+                if i == j or not games[i][j]:
+                    continue
+                e = expected(r[i], r[j])
+                grad += scores[i][j] - games[i][j] * e
+                info[i] += games[i][j] * e * (1.0 - e)
+            step = grad / (c * info[i])
+            step = max(-400.0, min(400.0, step))
+            r[i] += step
+            moved = max(moved, abs(step))
+        if moved < 1e-6:
+            break
+
+    return [(r[i], 1.96 / (c * math.sqrt(info[i]))) for i in range(n)]
+
+
+def run_tournament(
+    participants: List[Any],
+    games: int = 10,
+    workers: int = 4,
+    pool: str = "process",
+    chunk: int = 50,
+    default_qtable: str = DEFAULT_QTABLE,
+    snapshot_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    `games` parties par paire ET par couleur. Les paires sont découpées en tâches de
+    `chunk` parties pour répartir aussi les longues séries (bots distants) sur le pool.
+    """
+    specs = [parse_participant(p, default_qtable, snapshot_dir) for p in participants]
+    names = [s["name"] for s in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("noms de participants en double")
+    n = len(specs)
+    if n < 2:
+        raise ValueError("il faut au moins 2 participants")
+
+    tasks: List[Tuple[int, int, int]] = []
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            left = games
+            while left > 0:
+                k = min(chunk, left)
+                tasks.append((i, j, k))
+                left -= k
+
+    # Q-tables relues à chaque tournoi (le fichier peut avoir changé depuis le précédent)
+    tables = {
+        s["qtable"]: QLearningAgent(qtable_path=s["qtable"]).q for s in specs if s["kind"] == "rl"
+    }
+
+    t0 = time.perf_counter()
+    executor: Executor
+    if pool == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    with executor:
+        futures = [
+            executor.submit(
+                play_games, specs[i], specs[j], k,
+                {s["qtable"]: tables[s["qtable"]] for s in (specs[i], specs[j]) if s["kind"] == "rl"},
+            )
+            for i, j, k in tasks
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - t0
+
+    wins = [[0] * n for _ in range(n)]
+    draws = [[0] * n for _ in range(n)]
+    losses = [[0] * n for _ in range(n)]
+    pairings: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    errors = 0
+    last_error = ""
+    for (i, j, k), res in zip(tasks, results):
+        # i joue X, j joue O
+        wins[i][j] += res["x_wins"]
+        losses[j][i] += res["x_wins"]
+        wins[j][i] += res["o_wins"]
+        losses[i][j] += res["o_wins"]
+        draws[i][j] += res["draws"]
+        draws[j][i] += res["draws"]
+        errors += res["errors"]
+        if res["last_error"]:
+            last_error = res["last_error"]
+
+        p = pairings.setdefault((i, j), {"x": names[i], "o": names[j], "games": 0, "x_wins": 0,
+                                         "o_wins": 0, "draws": 0, "errors": 0, "moves": 0})
+        p["games"] += k
+        for key in ("x_wins", "o_wins", "draws", "errors", "moves"):
+            p[key] += res[key]
+
+    for p in pairings.values():
+        p["avg_moves"] = p.pop("moves") / max(1, p["games"])
+
+    played = [[wins[i][j] + draws[i][j] + losses[i][j] for j in range(n)] for i in range(n)]
+    scores = [[wins[i][j] + 0.5 * draws[i][j] for j in range(n)] for i in range(n)]
+    elo = elo_ratings(n, played, scores)
+
+    ranking = []
+    for i in range(n):
+        total = sum(played[i])
+        ranking.append({
+            "name": names[i],
+            "elo": round(elo[i][0], 1),
+            "ci95": round(elo[i][1], 1),
+            "score": (sum(scores[i]) / total) if total else 0.0,
+            "games": total,
+        })
+    ranking.sort(key=lambda e: -e["elo"])
+
+    return {
+        "participants": names,
+        "games_per_pairing": games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "pairings": list(pairings.values()),
+        "ranking": ranking,
+        "errors": errors,
+        "last_error": last_error,
+        "elapsed_s": elapsed,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Tournoi round-robin entre bots de morpion.")
+    ap.add_argument("participants", nargs="+", help="rl | rl:fichier.pkl | minimax | remote:URL")
+    ap.add_argument("--games", type=int, default=10, help="parties par paire et par couleur")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--pool", choices=("process", "thread"), default="process")
+    args = ap.parse_args()
+
+    res = run_tournament(args.participants, games=args.games, workers=args.workers, pool=args.pool)
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# traffic_replay.py
+"""
+Rejoue un trafic capturé (app.py avec CAPTURE_DIR=...) contre une instance locale,
+puis compare latences et réponses.
+
+- les requêtes sont regroupées en sessions (une partie = /api/new + ses /api/move ;
+  chaque /api/train ou /api/arena est sa propre session), rejouées en parallèle,
+  dans l'ordre à l'intérieur d'une session ; à --speed > 0 chaque session a son
+  thread, lancé à l'instant de sa première requête (concurrence d'origine) ;
+- --speed 1 respecte les écarts de temps d'origine, --speed 2 deux fois plus vite,
+  --speed 0 enchaîne au plus vite ;
+- les game_id capturés sont remplacés par ceux renvoyés par l'instance rejouée ;
+- les latences comparées sont côté serveur (en-tête Server-Timing des deux instances) ;
+  la latence vue par le client du replay est rapportée à part.
+
+Pour une comparaison coup pour coup, démarrer les deux instances depuis la même Q-table
+avec RL_ONLINE_UPDATES=0 (sinon l'apprentissage en ligne dépend de l'entrelacement).
+
+Usage :
+  python traffic_replay.py captures/ --base http://127.0.0.1:5000 --speed 0 --workers 16
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from offline_train import iter_events, log_files
+
+# champs qui changent d'une exécution à l'autre
+VOLATILE = {"id", "game_id", "epsilon", "global_stats", "elapsed_s", "games_per_s", "run_id", "qtable_states",
+            "bot_info"}
+
+
+def normalize(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: normalize(v) for k, v in obj.items() if k not in VOLATILE}
+    if isinstance(obj, list):
+        return [normalize(v) for v in obj]
+    return obj
+
+
+def server_timing(header: str) -> Optional[float]:
+    # "app;dur=1.234"
+    for part in header.split(";"):
+        part = part.strip()
+        if part.startswith("dur="):
+            try:
+                return float(part[4:])
+            except ValueError:
+                return None
+    return None
+
+
+def build_sessions(records: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    order: List[str] = []
+    for i, rec in enumerate(records):
+        key = f"req-{i}"
+        if rec["p"] == "/api/new":
+            key = (rec.get("r") or {}).get("id") or key
+        elif rec["p"] == "/api/move":
+            key = (rec.get("b") or {}).get("game_id") or key
+        if key not in sessions:
+            sessions[key] = []
+            order.append(key)
+        sessions[key].append(rec)
+    return [sessions[k] for k in order]
+
+
+class Replayer:
+    def __init__(self, base: str, speed: float, compare: Tuple[str, ...]):
+        self.base = base.rstrip("/")
+        self.speed = speed
+        self.compare = compare
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.results: List[Dict[str, Any]] = []
+        self.t_start = 0.0
+        self.ts0 = 0.0
+
+    def _session(self) -> requests.Session:
+        s = getattr(self._local, "s", None)
+        if s is None:
+            s = self._local.s = requests.Session()
+        return s
+
+    def play_session(self, recs: List[Dict[str, Any]]) -> None:
+        gid_map: Dict[str, str] = {}
+        for rec in recs:
+            if self.speed > 0:
+                due = self.t_start + (rec["ts"] - self.ts0) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            body = rec.get("b")
+            if isinstance(body, dict) and body.get("game_id") in gid_map:
+                body = dict(body, game_id=gid_map[body["game_id"]])
+            url = f"{self.base}{rec['p']}"
+            if rec.get("q"):
+                url += "?" + rec["q"]
+
+            t0 = time.perf_counter()
+            status = 0
+            server_ms: Optional[float] = None
+            resp_json: Optional[Any] = None
+            try:
+                resp = self._session().request(rec["m"], url, json=body, timeout=120)
+                status = resp.status_code
+                server_ms = server_timing(resp.headers.get("Server-Timing", ""))
+                text = resp.text  # consomme aussi les réponses en stream
+                resp_json = json.loads(text) if text and not resp.headers.get(
+                    "Content-Type", "").startswith("application/x-ndjson") else None
+            except (requests.RequestException, ValueError):
+                pass
+            client_ms = (time.perf_counter() - t0) * 1000.0
+
+            orig = rec.get("r")
+            if rec["p"] == "/api/new" and isinstance(orig, dict) and isinstance(resp_json, dict):
+                if orig.get("id") and resp_json.get("id"):
+                    gid_map[orig["id"]] = resp_json["id"]
+
+            same: Optional[bool] = None
+            if rec["p"] in self.compare and orig is not None:
+                same = status == rec["st"] and normalize(orig) == normalize(resp_json)
+
+            with self._lock:
+                self.results.append({
+                    "p": rec["p"],
+                    "orig_ms": rec.get("ms", 0.0),
+                    "ms": server_ms if server_ms is not None else client_ms,
+                    "client_ms": client_ms,
+                    "orig_status": rec["st"],
+                    "status": status,
+                    "same": same,
+                    "orig": orig,
+                    "got": resp_json,
+                })
+
+    def run(self, sessions: List[List[Dict[str, Any]]], workers: int) -> float:
+        """
+        speed > 0 : chaque session démarre sur son propre thread à l'instant de sa première
+        requête (concurrence d'origine, sans plafond) ; speed 0 : pool de `workers` threads.
+        """
+        ordered = sorted(sessions, key=lambda s: s[0]["ts"])
+        self.ts0 = ordered[0][0]["ts"]
+        self.t_start = time.perf_counter()
+
+        if self.speed <= 0:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                for f in [ex.submit(self.play_session, s) for s in ordered]:
+                    f.result()
+            return time.perf_counter() - self.t_start
+
+        threads: List[threading.Thread] = []
+        for sess in ordered:
+            delay = self.t_start + (sess[0]["ts"] - self.ts0) / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            t = threading.Thread(target=self.play_session, args=(sess,), daemon=True)
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        return time.perf_counter() - self.t_start
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, captured_span: float) -> Dict[str, Any]:
+    def pct(xs: List[float], p: float) -> float:
+        xs = sorted(xs)
+        return xs[min(len(xs) - 1, int(p / 100.0 * len(xs)))] if xs else 0.0
+
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        by_path.setdefault(r["p"], []).append(r)
+
+    endpoints = {}
+    for path, rs in sorted(by_path.items()):
+        orig = [r["orig_ms"] for r in rs]
+        new = [r["ms"] for r in rs]
+        client = [r["client_ms"] for r in rs]
+        compared = [r for r in rs if r["same"] is not None]
+        endpoints[path] = {
+            "requests": len(rs),
+            "status_mismatch": sum(1 for r in rs if r["status"] != r["orig_status"]),
+            "compared": len(compared),
+            "response_mismatch": sum(1 for r in compared if not r["same"]),
+            "orig_p50_ms": pct(orig, 50),
+            "p50_ms": pct(new, 50),
+            "orig_p95_ms": pct(orig, 95),
+            "p95_ms": pct(new, 95),
+            "p50_ratio": pct(new, 50) / pct(orig, 50) if pct(orig, 50) > 0 else 0.0,
+            "client_p50_ms": pct(client, 50),
+            "client_p95_ms": pct(client, 95),
+        }
+    return {"requests": len(results), "elapsed_s": elapsed, "captured_span_s": captured_span, "endpoints": endpoints}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Rejoue un trafic capturé et compare latences et réponses.")
+    ap.add_argument("paths", nargs="+", help="fichiers capture-*.ndjson ou dossiers")
+    ap.add_argument("--base", default="http://127.0.0.1:5000")
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = vitesse d'origine, 0 = au plus vite")
+    ap.add_argument("--workers", type=int, default=16, help="threads en mode --speed 0")
+    ap.add_argument("--compare", default="/api/new,/api/move,/api/arena",
+                    help="endpoints dont les réponses sont comparées")
+    ap.add_argument("--show-diffs", type=int, default=5, help="nombre de différences à afficher")
+    args = ap.parse_args()
+
+    # un même dossier peut aussi contenir le journal de parties (events-*.ndjson) : on filtre
+    records = sorted((r for r in iter_events(log_files(args.paths)) if "p" in r and "ts" in r),
+                     key=lambda r: r["ts"])
+    if not records:
+        raise SystemExit("aucune requête capturée")
+
+    rp = Replayer(args.base, args.speed, tuple(p for p in args.compare.split(",") if p))
+    elapsed = rp.run(build_sessions(records), args.workers)
+
+    report = summarize(rp.results, elapsed, records[-1]["ts"] - records[0]["ts"])
+    print(json.dumps(report, indent=2))
+
+    diffs = [r for r in rp.results if r["same"] is False][: args.show_diffs]
+    for d in diffs:
+        print(json.dumps({"p": d["p"], "orig": normalize(d["orig"]), "got": normalize(d["got"])}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()